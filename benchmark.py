@@ -0,0 +1,242 @@
+import os
+import sys
+import csv
+import glob
+import json
+import time
+import random
+import platform
+import argparse
+import subprocess
+import numpy as np
+import pygame
+import neat
+from core.car import Car
+from core.track import build_road_mask, build_distance_field
+from core.sensor_lut import SensorLUT
+from core.population_network import PopulationNetwork
+from core.speciation import load_config
+from training import NEATSimulation, CAR_SCALE
+
+CONFIG_PATH = os.path.join("config", "neat-car.cfg")
+RESULT_FIELDS = ["benchmark", "track", "variant", "value", "unit", "higher_is_better", "iterations", "seconds"]
+
+
+def find_tracks() -> list[str]:
+    """Every bundled track image, i.e. the PNGs in assets/ except the car sprite"""
+    return sorted(p for p in glob.glob(os.path.join("assets", "*.png")) if os.path.basename(p) != "car.png")
+
+
+def track_name(path: str) -> str:
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def timed(fn, min_time: float) -> tuple[int, float]:
+    """Call fn() (which returns how many operations it did) until min_time has passed"""
+    count, start = 0, time.perf_counter()
+    while True:
+        count += fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return count, elapsed
+
+
+def result(benchmark: str, track: str, variant: str, count: int, seconds: float, unit: str) -> dict:
+    return {"benchmark": benchmark, "track": track, "variant": variant, "value": count / seconds, "unit": unit,
+            "higher_is_better": True, "iterations": count, "seconds": seconds}
+
+
+def report(results: list[dict]) -> list[dict]:
+    for r in results:
+        print(f"  {r['benchmark']:16} {r['track']:9} {r['variant']:18} {r['value']:12.4g} {r['unit']}")
+    return results
+
+
+def random_poses(road_mask: np.ndarray, count: int, seed: int) -> list[tuple[float, float, float]]:
+    """Fixed on-road (x, y, angle) samples so every run measures the same rays"""
+    rng = random.Random(seed)
+    points = np.argwhere(road_mask)
+    poses = []
+    for _ in range(count):
+        x, y = points[rng.randrange(len(points))]
+        poses.append((x + rng.random(), y + rng.random(), rng.uniform(0, 360)))
+    return poses
+
+
+def bench_sensors(track_path: str, seed: int, min_time: float) -> list[dict]:
+    road_mask = build_road_mask(pygame.image.load(track_path))
+    distance_field = build_distance_field(road_mask)
+    sensor_lut = SensorLUT.load_or_build(track_path, road_mask, distance_field=distance_field)
+    poses = random_poses(road_mask, 200, seed)
+    car = Car(scale=CAR_SCALE)
+    name = track_name(track_path)
+
+    def cast(**engine):
+        def run():
+            for car.x, car.y, car.angle in poses:
+                for sensor_angle in Car.SENSOR_ANGLES:
+                    car.cast_sensor(sensor_angle, road_mask, **engine)
+            return len(poses) * len(Car.SENSOR_ANGLES)
+        return run
+
+    def collide():
+        for car.x, car.y, car.angle in poses:
+            car.is_alive = True
+            car.check_collision(road_mask)
+        return len(poses)
+
+    return [
+        result("cast_sensor", name, "grid", *timed(cast(), min_time), "rays/s"),
+        result("cast_sensor", name, "distance-field", *timed(cast(distance_field=distance_field), min_time), "rays/s"),
+        result("cast_sensor", name, "lut", *timed(cast(sensor_lut=sensor_lut), min_time), "rays/s"),
+        result("check_collision", name, "mask", *timed(collide, min_time), "checks/s"),
+    ]
+
+
+def bench_networks(config: neat.Config, genomes: list, seed: int, min_time: float) -> list[dict]:
+    nets = [neat.nn.FeedForwardNetwork.create(genome, config) for _, genome in genomes]
+    rng = np.random.default_rng(seed)
+    inputs = rng.random((len(nets), config.genome_config.num_inputs))
+    rows = [tuple(row) for row in inputs]
+
+    def activate():
+        for net, row in zip(nets, rows):
+            net.activate(row)
+        return len(nets)
+
+    population_net = PopulationNetwork(nets)
+
+    def activate_batched():
+        population_net.activate(inputs)
+        return len(nets)
+
+    return [
+        result("activate", "-", "FeedForwardNetwork", *timed(activate, min_time), "calls/s"),
+        result("activate", "-", "PopulationNetwork", *timed(activate_batched, min_time), "calls/s"),
+    ]
+
+
+def bench_generation(track_path: str, config: neat.Config, genomes: list, vectorized: bool, repeat: int) -> list[dict]:
+    """Headless run_generation on a fixed population; the median of `repeat` runs is reported"""
+    simulation = NEATSimulation(headless=True, vectorized=vectorized, track_paths=[track_path])
+    runs = []
+    for _ in range(repeat):
+        simulation.setup_cars(genomes, config)
+        start = time.perf_counter()
+        frames = simulation.run_generation()
+        runs.append((time.perf_counter() - start, frames))
+    seconds, frames = sorted(runs)[len(runs) // 2]
+
+    name, variant = track_name(track_path), "vectorized" if vectorized else "scalar"
+    return [
+        result("run_generation", name, variant, frames, seconds, "frames/s"),
+        {"benchmark": "run_generation", "track": name, "variant": variant, "value": seconds, "unit": "s/generation",
+         "higher_is_better": False, "iterations": frames, "seconds": seconds},
+    ]
+
+
+def environment(seed: int) -> dict:
+    try:
+        commit = subprocess.run(["git", "describe", "--always", "--dirty"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = "unknown"
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "seed": seed,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pygame": pygame.version.ver,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def write_results(path: str, meta: dict, results: list[dict]):
+    """Write <path>.json (environment + results) and <path>.csv (one row per result)"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".json", "w") as f:
+        json.dump({"environment": meta, "results": results}, f, indent=2)
+    with open(path + ".csv", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["commit"] + RESULT_FIELDS)
+        writer.writeheader()
+        for row in results:
+            writer.writerow({"commit": meta["commit"], **row})
+
+
+def compare(baseline_path: str, results: list[dict], tolerance: float) -> int:
+    """Print the change against a previous JSON run; returns how many results regressed beyond tolerance"""
+    with open(baseline_path) as f:
+        baseline = {(r["benchmark"], r["track"], r["variant"], r["unit"]): r for r in json.load(f)["results"]}
+    regressions = 0
+    for r in results:
+        old = baseline.get((r["benchmark"], r["track"], r["variant"], r["unit"]))
+        if old is None or old["value"] == 0:
+            continue
+        ratio = r["value"] / old["value"] if r["higher_is_better"] else old["value"] / r["value"]
+        flag = ""
+        if ratio < 1.0 - tolerance:
+            regressions += 1
+            flag = "  << REGRESSION"
+        print(f"  {r['benchmark']:16} {r['track']:9} {r['variant']:18} {r['unit']:12} {ratio:6.2f}x{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark sensors, networks and headless generations")
+    parser.add_argument("--tracks", nargs="+", metavar="NAME",
+                        help="track names from assets/ (default: every bundled track)")
+    parser.add_argument("--seed", type=int, default=1,
+                        help="seed for the sampled poses, inputs and the benchmark population")
+    parser.add_argument("--min-time", type=float, default=0.5,
+                        help="seconds to spend on each micro benchmark")
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="generations per end-to-end benchmark (the median is reported)")
+    parser.add_argument("--skip-micro", action="store_true", help="only run the end-to-end benchmarks")
+    parser.add_argument("--skip-e2e", action="store_true", help="only run the micro benchmarks")
+    parser.add_argument("--output", default=None,
+                        help="output path without extension (default: benchmarks/benchmark-<commit>)")
+    parser.add_argument("--compare", metavar="JSON", help="previous results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="allowed slowdown before --compare reports a regression")
+    args = parser.parse_args(argv)
+
+    tracks = find_tracks()
+    if args.tracks:
+        tracks = [p for p in tracks if track_name(p) in args.tracks]
+        missing = set(args.tracks) - {track_name(p) for p in tracks}
+        if missing:
+            parser.error(f"unknown tracks: {', '.join(sorted(missing))}")
+
+    pygame.init()
+    meta = environment(args.seed)
+    config = load_config(CONFIG_PATH)
+    random.seed(args.seed)
+    genomes = list(neat.Population(config).population.items())
+
+    results = []
+    if not args.skip_micro:
+        print("Micro benchmarks")
+        results += report(bench_networks(config, genomes, args.seed, args.min_time))
+        for path in tracks:
+            results += report(bench_sensors(path, args.seed, args.min_time))
+    if not args.skip_e2e:
+        print("End-to-end benchmarks")
+        for path in tracks:
+            for vectorized in (False, True):
+                results += report(bench_generation(path, config, genomes, vectorized, args.repeat))
+
+    output = args.output or os.path.join("benchmarks", f"benchmark-{meta['commit']}")
+    write_results(output, meta, results)
+    print(f"Results written to {output}.json and {output}.csv")
+
+    if args.compare:
+        print(f"Compared with {args.compare} (>1 is faster)")
+        if compare(args.compare, results, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,19 @@
 import os
 import math
+import time
+import numpy as np
 import pygame
+from render import sprite_cache
+from core import profiler
 
 
 class Car:
     SENSOR_ANGLES = [-60, -30, 0, 30, 60]
     MAX_SENSOR_DISTANCE = 200
     ROAD_COLOR = (130, 130, 130)
+    MARCH_MARGIN = 1.5
+    STEER_STEP = 3
+    _SENSOR_STEPS = np.arange(1, MAX_SENSOR_DISTANCE, dtype=np.float64)
     
     def __init__(self, x: float = 0.0, y: float = 0.0, image_path: str | None = None, scale: float = 1.0):
         self.x = x
@@ -28,34 +35,32 @@ class Car:
 
     def _load_image(self):
         if self.image_path and os.path.isfile(self.image_path):
-            image = pygame.image.load(self.image_path).convert_alpha()
+            path = self.image_path
         else:
             default_path = os.path.join(os.getcwd(), "assets", "car.png")
-            if os.path.isfile(default_path):
-                image = pygame.image.load(default_path).convert_alpha()
-            else:
-                image = self._generate_fallback()
+            path = default_path if os.path.isfile(default_path) else None
 
-        if self.scale != 1.0:
-            w = int(image.get_width() * self.scale)
-            h = int(image.get_height() * self.scale)
-            image = pygame.transform.smoothscale(image, (w, h))
-        self.base_image = image
+        # Loaded and scaled once per process, shared by every car
+        self.sprite = sprite_cache.get_sprite(path, self.scale, self.STEER_STEP, self._generate_fallback)
+        self.base_image = self.sprite.image
 
-    def get_image_and_rect(self, center_pos: tuple[int, int]) -> tuple[pygame.Surface, pygame.Rect]:
-        rotated = pygame.transform.rotate(self.base_image, -self.angle)
+    def get_image_and_rect(self, center_pos: tuple[int, int], tint: tuple[int, int, int] | None = None) -> tuple[pygame.Surface, pygame.Rect]:
+        rotated = self.sprite.rotated(self.angle, tint)
         rect = rotated.get_rect(center=center_pos)
         return rotated, rect
 
-    def get_corners(self):
-        """Get the four corner positions of the car for collision detection"""
+    def get_hitbox_half_size(self) -> tuple[float, float]:
+        """Half width/height of the collision box, a shrunken version of the sprite"""
         img_width = self.base_image.get_width()
         img_height = self.base_image.get_height()
         
         #shrink the hitbox
         shrink_factor = 0.4
-        half_w = (img_width / 2) * shrink_factor
-        half_h = (img_height / 2) * shrink_factor
+        return (img_width / 2) * shrink_factor, (img_height / 2) * shrink_factor
+
+    def get_corners(self):
+        """Get the four corner positions of the car for collision detection"""
+        half_w, half_h = self.get_hitbox_half_size()
         
         angle_rad = math.radians(self.angle)
         cos_a = math.cos(angle_rad)
@@ -76,65 +81,86 @@ class Car:
         
         return rotated_corners
     
-    def cast_sensor(self, sensor_angle: float, track_surface: pygame.Surface) -> float:
+    def cast_sensor(self, sensor_angle: float, road_mask: np.ndarray, distance_field: np.ndarray | None = None, sensor_lut=None) -> float:
         """Cast a ray from the car in the sensor direction and return distance to wall"""
         absolute_angle = self.angle + sensor_angle
+        if sensor_lut is not None:
+            return sensor_lut.lookup_point(self.x, self.y, (absolute_angle,))[0]
+        
         angle_rad = math.radians(absolute_angle)
         
         cos_a = math.cos(angle_rad)
         sin_a = math.sin(angle_rad)
         
-        for distance in range(1, self.MAX_SENSOR_DISTANCE):
-            x = self.x + cos_a * distance
-            y = self.y + sin_a * distance
-            
-            ix, iy = int(x), int(y)
-            
-            if ix < 0 or iy < 0 or ix >= track_surface.get_width() or iy >= track_surface.get_height():
-                return distance
-            
-            r, g, b, *_ = track_surface.get_at((ix, iy))
-            if (r, g, b) != self.ROAD_COLOR:
-                return distance
+        if distance_field is not None:
+            return self._march_sensor(cos_a, sin_a, road_mask, distance_field)
+        
+        # Sample every 1px step of the ray at once; the first non-road step is the hit
+        ix = (self.x + cos_a * self._SENSOR_STEPS).astype(np.intp)
+        iy = (self.y + sin_a * self._SENSOR_STEPS).astype(np.intp)
+        
+        width, height = road_mask.shape
+        inside = (ix >= 0) & (iy >= 0) & (ix < width) & (iy < height)
+        hit = ~inside
+        hit[inside] = ~road_mask[ix[inside], iy[inside]]
+        
+        first = int(hit.argmax())
+        if hit[first]:
+            return first + 1
         
         return self.MAX_SENSOR_DISTANCE
     
-    def check_collision(self, track_surface: pygame.Surface):
+    def _march_sensor(self, cos_a: float, sin_a: float, road_mask: np.ndarray, distance_field: np.ndarray) -> float:
+        """Sphere-trace a ray through the distance field, returning a sub-pixel wall distance"""
+        return march_ray(self.x, self.y, cos_a, sin_a, road_mask, distance_field, self.MAX_SENSOR_DISTANCE)
+    
+    def check_collision(self, road_mask: np.ndarray):
         """Check if any corner of the car is off the road"""
         corners = self.get_corners()
+        width, height = road_mask.shape
         
         for cx, cy in corners:
             ix, iy = int(cx), int(cy)
             
-            if ix < 0 or iy < 0 or ix >= track_surface.get_width() or iy >= track_surface.get_height():
+            if ix < 0 or iy < 0 or ix >= width or iy >= height:
                 self.is_alive = False
                 return
             
-            r, g, b, *_ = track_surface.get_at((ix, iy))
-            if (r, g, b) != self.ROAD_COLOR:
+            if not road_mask[ix, iy]:
                 self.is_alive = False
                 return
     
-    def update(self, track_surface: pygame.Surface | None = None):
+    def update(self, road_mask: np.ndarray | None = None, distance_field: np.ndarray | None = None, sensor_lut=None):
         if self.is_alive:
+            prof = profiler.current
+            if prof: start = time.perf_counter()
             angle_rad = math.radians(self.angle)
             self.x += math.cos(angle_rad) * self.speed
             self.y += math.sin(angle_rad) * self.speed
             self.distance_traveled += abs(self.speed)
+            if prof: prof.add("physics", start)
             
-            if track_surface:
-                for i, sensor_angle in enumerate(self.SENSOR_ANGLES):
-                    self.sensor_distances[i] = self.cast_sensor(sensor_angle, track_surface)
+            if road_mask is not None:
+                if prof: start = time.perf_counter()
+                if sensor_lut is not None:
+                    # One cell lookup for all sensors
+                    self.sensor_distances = sensor_lut.lookup_point(
+                        self.x, self.y, [self.angle + sensor_angle for sensor_angle in self.SENSOR_ANGLES])
+                else:
+                    for i, sensor_angle in enumerate(self.SENSOR_ANGLES):
+                        self.sensor_distances[i] = self.cast_sensor(sensor_angle, road_mask, distance_field)
+                if prof: prof.add("sensors", start); start = time.perf_counter()
                 
-                self.check_collision(track_surface)
+                self.check_collision(road_mask)
+                if prof: prof.add("collision", start)
     
     def apply_ai_control(self, outputs: tuple[float, ...]):
         if not self.is_alive:
             return
         
         # Steering
-        if outputs[0] > 0.5: self.angle -= 3
-        if outputs[1] > 0.5: self.angle += 3
+        if outputs[0] > 0.5: self.angle -= self.STEER_STEP
+        if outputs[1] > 0.5: self.angle += self.STEER_STEP
         self.angle %= 360
         
         # Speed control
@@ -148,18 +174,20 @@ class Car:
     def steer(self, direction: str):
         if self.is_alive and abs(self.speed) > 0.5:
             if direction == 'left':
-                self.angle -= 3
+                self.angle -= self.STEER_STEP
             elif direction == 'right':
-                self.angle += 3
+                self.angle += self.STEER_STEP
             self.angle %= 360
     
-    def draw(self, surface: pygame.Surface, center_pos: tuple[int, int] | None = None, tint: tuple[int, int, int] | None = None, draw_sensors: bool = False):
+    def draw(self, surface: pygame.Surface, center_pos: tuple[int, int] | None = None, tint: tuple[int, int, int] | None = None, draw_sensors: bool = False) -> pygame.Rect | None:
+        """Draw the car (and optionally its sensor rays); returns the area touched, or None if dead"""
         if not self.is_alive:
-            return
+            return None
         
         if center_pos is None:
             center_pos = (int(self.x), int(self.y))
         
+        dirty = []
         if draw_sensors:
             for i, sensor_angle in enumerate(self.SENSOR_ANGLES):
                 absolute_angle = self.angle + sensor_angle
@@ -170,13 +198,47 @@ class Car:
                 end_y = self.y + math.sin(angle_rad) * distance
                 
                 color = (0, 255, 0) if distance > 50 else (255, 255, 0) if distance > 20 else (255, 0, 0)
-                pygame.draw.line(surface, color, (int(self.x), int(self.y)), (int(end_x), int(end_y)), 2)
-                pygame.draw.circle(surface, color, (int(end_x), int(end_y)), 3)
-        
-        img, rect = self.get_image_and_rect(center_pos)
-        if tint:
-            overlay = pygame.Surface(img.get_size(), pygame.SRCALPHA)
-            overlay.fill((*tint, 80))
-            img = img.copy()
-            img.blit(overlay, (0, 0), special_flags=pygame.BLEND_RGBA_ADD)
-        surface.blit(img, rect)
+                dirty.append(pygame.draw.line(surface, color, (int(self.x), int(self.y)), (int(end_x), int(end_y)), 2))
+                dirty.append(pygame.draw.circle(surface, color, (int(end_x), int(end_y)), 3))
+        
+        img, rect = self.get_image_and_rect(center_pos, tint or None)
+        return surface.blit(img, rect).unionall(dirty)
+
+
+def march_ray(ox: float, oy: float, cos_a: float, sin_a: float, road_mask: np.ndarray, distance_field: np.ndarray,
+              max_distance: float = Car.MAX_SENSOR_DISTANCE, t: float = 0.0,
+              pixel: tuple[int, int] | None = None) -> float:
+    """Sphere-trace one ray from (ox, oy) through the distance field, returning a sub-pixel wall distance.
+
+    Near a wall the ray moves exactly into the next pixel it enters (a DDA
+    step) instead of nudging t by an epsilon, which could stall on rays that
+    start on a pixel edge. t and pixel resume a ray that march_rays started.
+    """
+    width, height = road_mask.shape
+    step_x = 1 if cos_a > 0 else -1
+    step_y = 1 if sin_a > 0 else -1
+    ix, iy = (math.floor(ox), math.floor(oy)) if pixel is None else pixel
+    
+    while t < max_distance:
+        if ix < 0 or iy < 0 or ix >= width or iy >= height or not road_mask[ix, iy]:
+            return t
+        
+        # The field is measured between pixel centres, so back off by a pixel diagonal
+        step = float(distance_field[ix, iy]) - Car.MARCH_MARGIN
+        if step >= 1.0:
+            t += step
+            ix = math.floor(ox + cos_a * t)
+            iy = math.floor(oy + sin_a * t)
+            continue
+        
+        # Close to a wall: move exactly into the next pixel the ray enters (DDA step)
+        tx = ((ix + 1 if cos_a > 0 else ix) - ox) / cos_a if cos_a else math.inf
+        ty = ((iy + 1 if sin_a > 0 else iy) - oy) / sin_a if sin_a else math.inf
+        if tx < ty:
+            ix += step_x
+            t = max(t, tx)
+        else:
+            iy += step_y
+            t = max(t, ty)
+    
+    return max_distance
@@ -0,0 +1,149 @@
+import time
+import numpy as np
+from core import profiler
+from core.car import Car
+from core.track import march_rays
+
+
+class CarBatch:
+    """Struct-of-arrays population of cars, advanced together with NumPy.
+
+    Mirrors Car.apply_ai_control/Car.update for every car at once so a frame
+    costs a handful of array operations instead of a Python loop per car.
+    """
+    SENSOR_ANGLES = np.array(Car.SENSOR_ANGLES, dtype=np.float64)
+    MAX_SENSOR_DISTANCE = Car.MAX_SENSOR_DISTANCE
+    _SENSOR_STEPS = np.arange(1, Car.MAX_SENSOR_DISTANCE, dtype=np.float64)
+
+    def __init__(self, count: int, x: float, y: float, angle: float, half_w: float, half_h: float, speed: float = 2.0):
+        self.x = np.full(count, x, dtype=np.float64)
+        self.y = np.full(count, y, dtype=np.float64)
+        self.angle = np.full(count, angle, dtype=np.float64)
+        self.speed = np.full(count, speed, dtype=np.float64)
+        self.alive = np.ones(count, dtype=bool)
+        self.distance_traveled = np.zeros(count, dtype=np.float64)
+        self.sensor_distances = np.zeros((count, len(Car.SENSOR_ANGLES)), dtype=np.float64)
+        self.half_w = half_w
+        self.half_h = half_h
+
+    @classmethod
+    def from_cars(cls, cars: list[Car]) -> "CarBatch":
+        """Build a batch from freshly created cars that share a start pose and sprite"""
+        first = cars[0]
+        half_w, half_h = first.get_hitbox_half_size()
+        batch = cls(len(cars), first.x, first.y, first.angle, half_w, half_h, first.speed)
+        for i, car in enumerate(cars):
+            batch.x[i] = car.x
+            batch.y[i] = car.y
+            batch.angle[i] = car.angle
+            batch.speed[i] = car.speed
+            batch.alive[i] = car.is_alive
+        return batch
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    def sync_to(self, cars: list[Car]):
+        """Copy the batch state back into Car objects, e.g. before drawing them"""
+        for i, car in enumerate(cars):
+            car.x = float(self.x[i])
+            car.y = float(self.y[i])
+            car.angle = float(self.angle[i])
+            car.speed = float(self.speed[i])
+            car.is_alive = bool(self.alive[i])
+            car.distance_traveled = float(self.distance_traveled[i])
+            car.sensor_distances = self.sensor_distances[i].tolist()
+
+    def apply_ai_control(self, outputs: np.ndarray):
+        """Vectorized Car.apply_ai_control for an (n, 4) output matrix; dead rows are ignored"""
+        pressed = (outputs > 0.5) & self.alive[:, None]
+        idle = self.alive & ~pressed[:, 2] & ~pressed[:, 3]
+
+        # Steering
+        self.angle[pressed[:, 0]] -= Car.STEER_STEP
+        self.angle[pressed[:, 1]] += Car.STEER_STEP
+        self.angle[self.alive] %= 360
+
+        # Speed control
+        accel = pressed[:, 2]
+        self.speed[accel] = np.minimum(self.speed[accel] + 0.2, 8.0)
+        brake = pressed[:, 3]
+        self.speed[brake] = np.maximum(self.speed[brake] - 0.2, 0.0)
+
+        # Friction
+        self.speed[idle] = np.maximum(self.speed[idle] - 0.02, 0)
+
+    def update(self, road_mask: np.ndarray | None = None, distance_field: np.ndarray | None = None, sensor_lut=None):
+        """Vectorized Car.update: move, cast sensors and check collisions for all alive cars"""
+        alive = np.flatnonzero(self.alive)
+        if len(alive) == 0:
+            return
+
+        prof = profiler.current
+        if prof: start = time.perf_counter()
+        angle_rad = np.radians(self.angle[alive])
+        speed = self.speed[alive]
+        self.x[alive] += np.cos(angle_rad) * speed
+        self.y[alive] += np.sin(angle_rad) * speed
+        self.distance_traveled[alive] += np.abs(speed)
+        if prof: prof.add("physics", start)
+
+        if road_mask is not None:
+            if prof: start = time.perf_counter()
+            if sensor_lut is not None:
+                self.sensor_distances[alive] = sensor_lut.lookup(
+                    self.x[alive][:, None], self.y[alive][:, None], self.angle[alive][:, None] + self.SENSOR_ANGLES)
+            elif distance_field is not None:
+                self.sensor_distances[alive] = self._march_sensors(alive, road_mask, distance_field)
+            else:
+                self.sensor_distances[alive] = self._cast_sensors(alive, road_mask)
+            if prof: prof.add("sensors", start); start = time.perf_counter()
+            self._check_collision(alive, road_mask)
+            if prof: prof.add("collision", start)
+
+    def get_corners(self, index: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Hitbox corners of the selected cars as two (n, 4) arrays, in Car.get_corners order"""
+        angle_rad = np.radians(self.angle[index])
+        cos_a = np.cos(angle_rad)[:, None]
+        sin_a = np.sin(angle_rad)[:, None]
+        cx = np.array([-self.half_w, self.half_w, self.half_w, -self.half_w])
+        cy = np.array([-self.half_h, -self.half_h, self.half_h, self.half_h])
+        rx = cx * cos_a - cy * sin_a + self.x[index][:, None]
+        ry = cx * sin_a + cy * cos_a + self.y[index][:, None]
+        return rx, ry
+
+    def _on_road(self, x: np.ndarray, y: np.ndarray, road_mask: np.ndarray) -> np.ndarray:
+        ix = x.astype(np.intp)
+        iy = y.astype(np.intp)
+        width, height = road_mask.shape
+        inside = (ix >= 0) & (iy >= 0) & (ix < width) & (iy < height)
+        on_road = np.zeros(ix.shape, dtype=bool)
+        on_road[inside] = road_mask[ix[inside], iy[inside]]
+        return on_road
+
+    def _check_collision(self, index: np.ndarray, road_mask: np.ndarray):
+        rx, ry = self.get_corners(index)
+        crashed = ~self._on_road(rx, ry, road_mask).all(axis=1)
+        self.alive[index[crashed]] = False
+
+    def _ray_directions(self, index: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        angle_rad = np.radians(self.angle[index][:, None] + self.SENSOR_ANGLES[None, :])
+        return np.cos(angle_rad), np.sin(angle_rad)
+
+    def _cast_sensors(self, index: np.ndarray, road_mask: np.ndarray) -> np.ndarray:
+        """Same 1px stepping as Car.cast_sensor, for every ray of every selected car"""
+        cos_a, sin_a = self._ray_directions(index)
+        xs = self.x[index][:, None, None] + cos_a[:, :, None] * self._SENSOR_STEPS
+        ys = self.y[index][:, None, None] + sin_a[:, :, None] * self._SENSOR_STEPS
+        hit = ~self._on_road(xs, ys, road_mask)
+
+        first = hit.argmax(axis=2)
+        return np.where(hit.any(axis=2), first + 1, self.MAX_SENSOR_DISTANCE).astype(np.float64)
+
+    def _march_sensors(self, index: np.ndarray, road_mask: np.ndarray, distance_field: np.ndarray) -> np.ndarray:
+        """Same sphere tracing as Car._march_sensor, for every ray of every selected car"""
+        cos_a, sin_a = self._ray_directions(index)
+        ox = np.repeat(self.x[index], len(self.SENSOR_ANGLES))
+        oy = np.repeat(self.y[index], len(self.SENSOR_ANGLES))
+        distances = march_rays(ox, oy, cos_a.ravel(), sin_a.ravel(), road_mask, distance_field, self.MAX_SENSOR_DISTANCE)
+        return distances.reshape(len(index), len(self.SENSOR_ANGLES))
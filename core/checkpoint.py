@@ -0,0 +1,139 @@
+import os
+import re
+import gzip
+import glob
+import queue
+import pickle
+import random
+import threading
+import neat
+import numpy as np
+
+CHECKPOINT_DIR = "checkpoints"
+_CHECKPOINT_NAME = re.compile(r"checkpoint-(\d+)\.pkl\.gz$")
+
+
+class BackgroundWriter:
+    """Writes files on a background thread so the simulation never waits on disk.
+
+    Callers hand over already-pickled bytes, so the snapshot is consistent
+    even though the population keeps changing. Each file is written to a
+    temp name and renamed into place, so a crash never leaves a torn file.
+    append() instead adds to the end of a file, e.g. one CSV row at a time,
+    and submit_arrays() compresses a dict of numpy arrays into an .npz.
+    """
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name="checkpoint-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, path: str, data: bytes, compress: bool = False, on_done=None):
+        self.queue.put((path, data, compress, False, on_done))
+
+    def append(self, path: str, data: bytes):
+        self.queue.put((path, data, False, True, None))
+
+    def submit_arrays(self, path: str, arrays: dict):
+        self.queue.put((path, arrays, True, False, None))
+
+    def _run(self):
+        while True:
+            job = self.queue.get()
+            if job is None:
+                return
+            path, data, compress, append, on_done = job
+            try:
+                if append:
+                    with open(path, "ab") as f:
+                        f.write(data)
+                    continue
+                tmp_path = path + ".tmp"
+                if isinstance(data, dict):
+                    with open(tmp_path, "wb") as f:
+                        np.savez_compressed(f, **data)
+                else:
+                    with (gzip.open(tmp_path, "wb", compresslevel=5) if compress else open(tmp_path, "wb")) as f:
+                        f.write(data)
+                os.replace(tmp_path, path)
+                if on_done is not None:
+                    on_done(path)
+            except OSError as e:
+                print(f"  > Failed to write {path}: {e}")
+
+    def close(self):
+        """Finish every pending write"""
+        self.queue.put(None)
+        self.thread.join()
+
+
+class AsyncCheckpointer(neat.reporting.BaseReporter):
+    """Periodically saves the full NEAT state (population, species, generation, RNG).
+
+    Like neat.Checkpointer, a checkpoint labeled N resumes at the start of
+    generation N. get_extra() lets the caller store its own state alongside,
+    e.g. the best fitness seen. Only the newest `keep` checkpoints are kept.
+    """
+
+    def __init__(self, writer: BackgroundWriter, directory: str = CHECKPOINT_DIR, interval: int = 5, keep: int = 3,
+                 get_extra=None):
+        self.writer = writer
+        self.directory = directory
+        self.interval = interval
+        self.keep = keep
+        self.get_extra = get_extra or dict
+        self.current_generation = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def start_generation(self, generation):
+        self.current_generation = generation
+
+    def end_generation(self, config, population, species_set):
+        # population and species_set already belong to the next generation
+        generation = self.current_generation + 1
+        if generation % self.interval != 0:
+            return
+        # The reporter set (this writer included) is reattached by Population on restore
+        reporters, species_set.reporters = species_set.reporters, None
+        try:
+            data = pickle.dumps((generation, config, population, species_set, random.getstate(), self.get_extra()),
+                                protocol=pickle.HIGHEST_PROTOCOL)
+        finally:
+            species_set.reporters = reporters
+        path = os.path.join(self.directory, f"checkpoint-{generation}.pkl.gz")
+        self.writer.submit(path, data, compress=True, on_done=self._prune)
+        print(f"  > Checkpointing generation {generation} to {path}")
+
+    def _prune(self, _path):
+        # Runs on the writer thread, after the new checkpoint is safely in place
+        for old in list_checkpoints(self.directory)[:-self.keep]:
+            os.remove(old)
+
+
+def list_checkpoints(directory: str = CHECKPOINT_DIR) -> list[str]:
+    """Checkpoint files in the directory, oldest generation first"""
+    paths = [p for p in glob.glob(os.path.join(directory, "checkpoint-*.pkl.gz")) if _CHECKPOINT_NAME.search(p)]
+    return sorted(paths, key=lambda p: int(_CHECKPOINT_NAME.search(p).group(1)))
+
+
+def load_population(path: str) -> tuple[int, dict]:
+    """The generation and {genome_id: genome} population stored in a checkpoint, without restoring the run"""
+    with gzip.open(path) as f:
+        generation, _config, population, *_ = pickle.load(f)
+    return generation, population
+
+
+def restore_checkpoint(path: str, config: neat.Config) -> tuple[neat.Population, dict]:
+    """Rebuild a Population from a checkpoint; returns it with the caller's extra state"""
+    with gzip.open(path) as f:
+        generation, saved_config, population, species_set, rndstate, extra = pickle.load(f)
+    random.setstate(rndstate)
+
+    restored = neat.Population(config, (population, species_set, generation))
+    # Keep innovation numbers and node ids continuing from the saved run instead of restarting them
+    tracker = getattr(saved_config.genome_config, "innovation_tracker", None)
+    if tracker is not None:
+        restored.reproduction.innovation_tracker = tracker
+        config.genome_config.innovation_tracker = tracker
+    config.genome_config.node_indexer = saved_config.genome_config.node_indexer
+    return restored, extra
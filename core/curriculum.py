@@ -0,0 +1,35 @@
+import numpy as np
+
+# How per-track fitness is combined into one genome fitness
+AGGREGATES = {
+    "mean": lambda fitness: fitness.mean(axis=0),
+    "min": lambda fitness: fitness.min(axis=0),
+}
+
+
+class Curriculum:
+    """Chooses which of an ordered list of tracks a generation is evaluated on.
+
+    Without unlock_fitness every track is active. With it, training starts on
+    the first `start` tracks and unlocks the next one whenever a generation's
+    best aggregated fitness reaches unlock_fitness.
+    """
+
+    def __init__(self, track_count: int, unlock_fitness: float | None = None, start: int = 1, aggregate: str = "mean"):
+        if aggregate not in AGGREGATES:
+            raise ValueError(f"Unknown fitness aggregate: {aggregate}")
+        self.track_count = track_count
+        self.unlock_fitness = unlock_fitness
+        self.unlocked = track_count if unlock_fitness is None else max(1, min(start, track_count))
+        self.aggregate = AGGREGATES[aggregate]
+
+    def combine(self, fitness: np.ndarray) -> np.ndarray:
+        """Reduce a (tracks, genomes) fitness array to one fitness per genome"""
+        return self.aggregate(fitness)
+
+    def update(self, best_fitness: float) -> bool:
+        """Unlock the next track if best_fitness is high enough; returns True if one was unlocked"""
+        if self.unlock_fitness is None or self.unlocked >= self.track_count or best_fitness < self.unlock_fitness:
+            return False
+        self.unlocked += 1
+        return True
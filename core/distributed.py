@@ -0,0 +1,413 @@
+import os
+import json
+import time
+import socket
+import struct
+import selectors
+from collections import deque
+from collections.abc import Callable
+import numpy as np
+import neat
+from neat.activations import ActivationFunctionSet
+from neat.aggregations import AggregationFunctionSet
+from core.simulation import evaluate_track
+from core.track_bundle import content_hash
+from core.track_cache import POSE_PATH, Track, load_track
+
+DEFAULT_PORT = 5757
+BATCH_SIZE = 16
+TASK_TIMEOUT = 60.0
+# Tasks queued on each worker, so it starts the next batch without waiting for a round trip
+IN_FLIGHT = 2
+_FRAME = struct.Struct("<II")
+
+
+def parse_address(text: str, default_host: str = "127.0.0.1") -> tuple[str, int]:
+    """'host:port', 'host', ':port' or 'port' -> (host, port)"""
+    if ":" in text:
+        host, _, port = text.rpartition(":")
+    elif text.isdigit():
+        host, port = "", text
+    else:
+        host, port = text, ""
+    return host or default_host, int(port) if port else DEFAULT_PORT
+
+
+def send_message(sock: socket.socket, kind: str, arrays: dict[str, np.ndarray] | None = None, **fields) -> int:
+    """Send one message: a JSON header followed by the raw bytes of each array; returns bytes sent"""
+    arrays = arrays or {}
+    header = json.dumps({"type": kind, **fields,
+                         "arrays": {name: [a.dtype.str, list(a.shape)] for name, a in arrays.items()}}).encode()
+    payload = b"".join(np.ascontiguousarray(a).tobytes() for a in arrays.values())
+    sock.sendall(_FRAME.pack(len(header), len(payload)) + header + payload)
+    return _FRAME.size + len(header) + len(payload)
+
+
+def _decode(header: bytes, payload: bytes) -> tuple[dict, dict[str, np.ndarray]]:
+    header = json.loads(header)
+    arrays, offset = {}, 0
+    for name, (dtype, shape) in header.pop("arrays").items():
+        dtype = np.dtype(dtype)
+        count = int(np.prod(shape))
+        arrays[name] = np.frombuffer(payload, dtype, count, offset).reshape(shape)
+        offset += count * dtype.itemsize
+    return header, arrays
+
+
+class MessageReader:
+    """Reassembles messages from the bytes of a non-blocking read loop"""
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def feed(self, data: bytes) -> list[tuple[dict, dict[str, np.ndarray]]]:
+        """Add received bytes; returns every message completed by them"""
+        self.buffer += data
+        messages = []
+        while len(self.buffer) >= _FRAME.size:
+            header_size, payload_size = _FRAME.unpack_from(self.buffer)
+            end = _FRAME.size + header_size + payload_size
+            if len(self.buffer) < end:
+                break
+            header = bytes(self.buffer[_FRAME.size:_FRAME.size + header_size])
+            messages.append(_decode(header, bytes(self.buffer[_FRAME.size + header_size:end])))
+            del self.buffer[:end]
+        return messages
+
+
+def recv_message(sock: socket.socket) -> tuple[dict, dict[str, np.ndarray]] | None:
+    """Block until one whole message arrives; None if the peer closed the connection"""
+    def read(size):
+        data = bytearray()
+        while len(data) < size:
+            chunk = sock.recv(size - len(data))
+            if not chunk:
+                return None
+            data += chunk
+        return bytes(data)
+
+    frame = read(_FRAME.size)
+    if frame is None:
+        return None
+    header_size, payload_size = _FRAME.unpack(frame)
+    data = read(header_size + payload_size)
+    return None if data is None else _decode(data[:header_size], data[header_size:])
+
+
+def encode_networks(nets: list, config: neat.Config) -> tuple[dict, dict[str, np.ndarray]]:
+    """Flatten compiled FeedForwardNetworks into arrays, plus the activation and aggregation names they use.
+
+    Only expressed, required nodes and links survive FeedForwardNetwork.create,
+    so this is much smaller than the pickled genomes. Weights stay float64 so
+    workers compute exactly what a local evaluation would.
+    """
+    genome_config = config.genome_config
+    activation_names = {f: name for name, f in genome_config.activation_defs.functions.items()}
+    aggregation_names = {f: name for name, f in genome_config.aggregation_function_defs.functions.items()}
+    activations, aggregations = [], []
+    node_counts, node_keys, node_functions, node_params, link_counts, link_inputs, link_weights = [], [], [], [], [], [], []
+    for net in nets:
+        node_counts.append(len(net.node_evals))
+        for node, act_func, agg_func, bias, response, links in net.node_evals:
+            act, agg = activation_names[act_func], aggregation_names[agg_func]
+            if act not in activations:
+                activations.append(act)
+            if agg not in aggregations:
+                aggregations.append(agg)
+            node_keys.append(node)
+            node_functions.append((activations.index(act), aggregations.index(agg)))
+            node_params.append((bias, response))
+            link_counts.append(len(links))
+            for inode, weight in links:
+                link_inputs.append(inode)
+                link_weights.append(weight)
+    names = {"activations": activations, "aggregations": aggregations}
+    arrays = {"node_counts": np.array(node_counts, dtype=np.int32),
+              "node_keys": np.array(node_keys, dtype=np.int32),
+              "node_functions": np.array(node_functions, dtype=np.uint8).reshape(-1, 2),
+              "node_params": np.array(node_params, dtype=np.float64).reshape(-1, 2),
+              "link_counts": np.array(link_counts, dtype=np.int32),
+              "link_inputs": np.array(link_inputs, dtype=np.int32),
+              "link_weights": np.array(link_weights, dtype=np.float64)}
+    return names, arrays
+
+
+def decode_networks(names: dict, arrays: dict[str, np.ndarray], input_keys: list[int],
+                    output_keys: list[int]) -> list[neat.nn.FeedForwardNetwork]:
+    """Rebuild the networks packed by encode_networks"""
+    activation_set, aggregation_set = ActivationFunctionSet(), AggregationFunctionSet()
+    activations = [activation_set.get(name) for name in names["activations"]]
+    aggregations = [aggregation_set.get(name) for name in names["aggregations"]]
+    node_keys = arrays["node_keys"].tolist()
+    node_functions = arrays["node_functions"].tolist()
+    node_params = arrays["node_params"].tolist()
+    link_counts = arrays["link_counts"].tolist()
+    link_inputs = arrays["link_inputs"].tolist()
+    link_weights = arrays["link_weights"].tolist()
+
+    nets, node, link = [], 0, 0
+    for count in arrays["node_counts"].tolist():
+        node_evals = []
+        for n in range(node, node + count):
+            links = list(zip(link_inputs[link:link + link_counts[n]], link_weights[link:link + link_counts[n]]))
+            link += link_counts[n]
+            act, agg = node_functions[n]
+            node_evals.append((node_keys[n], activations[act], aggregations[agg], *node_params[n], links))
+        node += count
+        nets.append(neat.nn.FeedForwardNetwork(list(input_keys), list(output_keys), node_evals))
+    return nets
+
+
+class _Connection:
+    """Coordinator-side state of one worker"""
+
+    def __init__(self, sock: socket.socket, address):
+        self.sock = sock
+        self.name = f"{address[0]}:{address[1]}"
+        self.reader = MessageReader()
+        self.ready = False
+        self.in_flight = {}
+        self.batches = 0
+        self.genomes = 0
+
+
+class DistributedEvaluator:
+    """Evaluates generations on worker processes that connect over TCP (python distributed.py worker).
+
+    Genomes are compiled into networks here and shipped in batches of
+    batch_size as flat arrays. Workers load and verify the compiled tracks
+    themselves when they connect, so only networks and fitness cross the
+    wire. Every batch in flight has a deadline; a worker that disconnects or
+    misses one is dropped and its batches are sent to the others. Cars never
+    interact, so fitness is identical to a local run. Has the same
+    evaluate() interface as ParallelEvaluator, and eval_genomes() can be
+    passed to population.run directly.
+
+    The protocol is unauthenticated; only bind it to trusted networks.
+    """
+
+    def __init__(self, config: neat.Config, tracks: list[Track], hitbox: tuple[float, float],
+                 address: tuple[str, int] = ("127.0.0.1", DEFAULT_PORT), sensor_engine: str = "grid",
+                 lut_options: dict | None = None, fitness_mode: str = "distance",
+                 batch_size: int = BATCH_SIZE, task_timeout: float = TASK_TIMEOUT):
+        self.config = config
+        self.batch_size = max(1, batch_size)
+        self.task_timeout = task_timeout
+        self.setup = {
+            "tracks": [[os.path.relpath(track.path), content_hash(track.path, POSE_PATH)] for track in tracks],
+            "sensor_engine": sensor_engine, "lut_options": lut_options or {}, "fitness_mode": fitness_mode,
+            "hitbox": list(hitbox), "input_keys": config.genome_config.input_keys,
+            "output_keys": config.genome_config.output_keys,
+        }
+        self.listener = socket.create_server(address)
+        self.listener.setblocking(False)
+        self.address = self.listener.getsockname()[:2]
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.listener, selectors.EVENT_READ)
+        self.connections = []
+        # Batches of the generation being evaluated that still need a worker, and those finished
+        self.pending = deque()
+        self.done = set()
+        self.totals = {"batches": 0, "redispatched": 0, "dropped": 0, "sent": 0, "received": 0}
+        self.last_report = ""
+        # Called with the worker's name after each result is stored, e.g. to inject failures in tests
+        self.on_result: Callable[[str], None] | None = None
+        print(f"  > Waiting for workers on {self.address[0]}:{self.address[1]}")
+
+    def evaluate(self, genomes: list, track_indices=(0,)) -> tuple[np.ndarray, int, float]:
+        """Fitness of every genome on every given track as a (tracks, genomes) array,
+        plus the frames simulated (summed over tracks) and the best fitness seen"""
+        start = time.perf_counter()
+        totals = dict(self.totals)
+        nets = [neat.nn.FeedForwardNetwork.create(genome, self.config) for genome in genomes]
+        tasks = [(row, track, s, min(s + self.batch_size, len(nets)))
+                 for row, track in enumerate(track_indices) for s in range(0, len(nets), self.batch_size)]
+        # Encoded once; re-dispatched batches are sent as they are
+        payloads = [encode_networks(nets[s:e], self.config) for _, _, s, e in tasks]
+        self.pending = pending = deque(range(len(tasks)))
+        self.done = done = set()
+
+        fitness = np.zeros((len(track_indices), len(genomes)))
+        track_frames = np.zeros(len(track_indices), dtype=int)
+        max_fitness = 0.0
+        waiting_since = None
+        while len(done) < len(tasks):
+            self._dispatch(tasks, payloads)
+            for key, _ in self.selector.select(timeout=0.5):
+                if key.data is None:
+                    self._accept()
+                    continue
+                connection = key.data
+                for header, arrays in self._receive(connection):
+                    if header["type"] == "ready":
+                        connection.ready = True
+                        connection.name = header.get("name", connection.name)
+                        print(f"  > Worker {connection.name} joined ({self._ready_count()} connected)")
+                    elif header["type"] == "result":
+                        task = header["task"]
+                        connection.in_flight.pop(task, None)
+                        if task in done:
+                            continue
+                        done.add(task)
+                        row, _, s, e = tasks[task]
+                        fitness[row, s:e] = arrays["fitness"]
+                        track_frames[row] = max(track_frames[row], header["frames"])
+                        max_fitness = max(max_fitness, header["max_fitness"])
+                        connection.batches += 1
+                        connection.genomes += e - s
+                        if self.on_result is not None:
+                            self.on_result(connection.name)
+                    elif header["type"] == "error":
+                        print(f"  > Worker {connection.name} failed: {header['message']}")
+                        self._drop(connection)
+            now = time.perf_counter()
+            for connection in list(self.connections):
+                if any(now - sent > self.task_timeout for sent in connection.in_flight.values()):
+                    print(f"  > Worker {connection.name} timed out, re-dispatching its batches")
+                    self._drop(connection)
+            if self._ready_count() == 0:
+                if waiting_since is None:
+                    waiting_since = now
+                elif now - waiting_since > 10:
+                    print(f"  > No workers connected to {self.address[0]}:{self.address[1]}, still waiting")
+                    waiting_since = now
+            else:
+                waiting_since = None
+
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        frames = int(track_frames.sum())
+        self.totals["batches"] += len(tasks)
+        delta = {name: self.totals[name] - totals[name] for name in self.totals}
+        self.last_report = (f"{self._ready_count()} workers, {len(tasks)} batches "
+                            f"({delta['redispatched']} re-dispatched), "
+                            f"{len(genomes) * len(track_indices) / elapsed:.0f} genomes/s, "
+                            f"{delta['sent'] / 1024:.1f} KB sent, {delta['received'] / 1024:.1f} KB received")
+        return fitness, frames, max_fitness
+
+    def eval_genomes(self, genomes, config):
+        """population.run fitness function: mean fitness over every track the evaluator was given"""
+        genomes = [genome for _, genome in genomes]
+        fitness, _, _ = self.evaluate(genomes, range(len(self.setup["tracks"])))
+        for genome, value in zip(genomes, fitness.mean(axis=0)):
+            genome.fitness = float(value)
+        print(f"  > Distributed: {self.last_report}")
+
+    def in_flight(self) -> dict[str, int]:
+        """Batches each connected worker has been sent and not yet answered"""
+        return {connection.name: len(connection.in_flight) for connection in self.connections}
+
+    def worker_summary(self) -> list[str]:
+        return [f"{c.name}: {c.batches} batches, {c.genomes} genomes" for c in self.connections]
+
+    def _ready_count(self) -> int:
+        return sum(connection.ready for connection in self.connections)
+
+    def _accept(self):
+        sock, address = self.listener.accept()
+        sock.setblocking(True)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        connection = _Connection(sock, address)
+        try:
+            self.totals["sent"] += send_message(sock, "setup", **self.setup)
+        except OSError:
+            sock.close()
+            return
+        self.connections.append(connection)
+        self.selector.register(sock, selectors.EVENT_READ, connection)
+
+    def _receive(self, connection: _Connection) -> list:
+        try:
+            data = connection.sock.recv(1 << 16)
+        except OSError:
+            data = b""
+        if not data:
+            print(f"  > Worker {connection.name} disconnected")
+            self._drop(connection)
+            return []
+        self.totals["received"] += len(data)
+        return connection.reader.feed(data)
+
+    def _dispatch(self, tasks: list, payloads: list):
+        pending, done = self.pending, self.done
+        for connection in list(self.connections):
+            while connection.ready and pending and len(connection.in_flight) < IN_FLIGHT:
+                task = pending.popleft()
+                if task in done:
+                    continue
+                names, arrays = payloads[task]
+                try:
+                    self.totals["sent"] += send_message(connection.sock, "task", arrays, task=task,
+                                                        track=tasks[task][1], **names)
+                except OSError:
+                    pending.appendleft(task)
+                    self._drop(connection)
+                    break
+                connection.in_flight[task] = time.perf_counter()
+
+    def _drop(self, connection: _Connection):
+        """Close a worker's connection and put its unfinished batches back at the front of the queue"""
+        if connection not in self.connections:
+            return
+        self.connections.remove(connection)
+        self.selector.unregister(connection.sock)
+        connection.sock.close()
+        self.totals["dropped"] += 1
+        for task in connection.in_flight:
+            if task not in self.done:
+                self.pending.appendleft(task)
+                self.totals["redispatched"] += 1
+        connection.in_flight.clear()
+
+    def close(self):
+        for connection in list(self.connections):
+            try:
+                send_message(connection.sock, "close")
+            except OSError:
+                pass
+            connection.sock.close()
+        self.connections = []
+        self.selector.close()
+        self.listener.close()
+
+
+def run_worker(address: tuple[str, int], connect_timeout: float = 30.0, name: str | None = None) -> int:
+    """Connect to a coordinator and evaluate batches until it closes the connection; returns batches done"""
+    deadline = time.perf_counter() + connect_timeout
+    while True:
+        try:
+            sock = socket.create_connection(address)
+            break
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            time.sleep(0.5)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    name = name or f"{socket.gethostname()}:{os.getpid()}"
+
+    with sock:
+        message = recv_message(sock)
+        if message is None:
+            return 0
+        setup, _ = message
+        tracks = []
+        for path, expected in setup["tracks"]:
+            track_path = os.path.join(os.getcwd(), path)
+            if not os.path.exists(track_path) or content_hash(track_path, POSE_PATH) != expected:
+                send_message(sock, "error", message=f"{path} is missing or differs from the coordinator's")
+                return 0
+            # Memory-mapped from the local compiled bundle
+            tracks.append(load_track(track_path, setup["sensor_engine"], setup["lut_options"], setup["fitness_mode"]))
+        hitbox = tuple(setup["hitbox"])
+        send_message(sock, "ready", name=name)
+
+        batches = 0
+        while True:
+            message = recv_message(sock)
+            if message is None or message[0]["type"] == "close":
+                return batches
+            header, arrays = message
+            nets = decode_networks(header, arrays, setup["input_keys"], setup["output_keys"])
+            simulation = evaluate_track(tracks[header["track"]], nets, hitbox)
+            send_message(sock, "result", {"fitness": simulation.fitness}, task=header["task"],
+                         frames=simulation.frame_count, max_fitness=simulation.max_fitness)
+            batches += 1
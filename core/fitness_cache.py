@@ -0,0 +1,61 @@
+import hashlib
+from collections import OrderedDict
+
+
+def genome_fingerprint(genome) -> bytes:
+    """Digest of everything FeedForwardNetwork.create reads from a genome.
+
+    Connections keep the genome's own order rather than being sorted, since
+    that order decides the summation order of each node's inputs and so the
+    exact floating point result.
+    """
+    nodes = tuple((key, node.bias, node.response, node.activation, node.aggregation)
+                  for key, node in sorted(genome.nodes.items()))
+    connections = tuple((key, conn.weight) for key, conn in genome.connections.items() if conn.enabled)
+    return hashlib.blake2b(repr((nodes, connections)).encode(), digest_size=16).digest()
+
+
+class FitnessCache:
+    """Bounded LRU of fitness by (genome fingerprint, evaluation context).
+
+    The simulation is deterministic, so a genome that survives unchanged
+    (elites, unmutated offspring) scores the same as last time on the same
+    tracks and settings. The context is any hashable value that changes
+    whenever those do, e.g. the active tracks or the sensor engine.
+    """
+
+    def __init__(self, max_size: int = 4096):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.generation_hits = 0
+        self.generation_lookups = 0
+
+    def get(self, genome, context) -> float | None:
+        key = (genome_fingerprint(genome), context)
+        self.generation_lookups += 1
+        fitness = self.entries.get(key)
+        if fitness is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        self.generation_hits += 1
+        return fitness
+
+    def put(self, genome, context, fitness: float):
+        self.entries[(genome_fingerprint(genome), context)] = fitness
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / max(self.hits + self.misses, 1)
+
+    def end_generation(self) -> str:
+        """One-line hit report for the generation just evaluated, then reset the per-generation counters"""
+        line = (f"{self.generation_hits}/{self.generation_lookups} genomes from cache, "
+                f"{self.hit_rate:.0%} overall, {len(self.entries)} entries")
+        self.generation_hits = self.generation_lookups = 0
+        return line
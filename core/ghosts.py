@@ -0,0 +1,99 @@
+import os
+import re
+import glob
+import pickle
+import numpy as np
+import neat
+from core.car import Car
+from core.car_batch import CarBatch
+from core.population_network import PopulationNetwork
+
+CHAMPION_DIR = "champions"
+_CHAMPION_NAME = re.compile(r"gen-(\d+)\.pkl$")
+
+
+def list_champions(directory: str = CHAMPION_DIR) -> dict[int, str]:
+    """Archived generation champions in a directory as {generation: path}"""
+    paths = {}
+    for path in glob.glob(os.path.join(directory, "gen-*.pkl")):
+        match = _CHAMPION_NAME.search(path)
+        if match:
+            paths[int(match.group(1))] = path
+    return dict(sorted(paths.items()))
+
+
+def load_champions(directory: str = CHAMPION_DIR, limit: int | None = None) -> list[tuple[str, object]]:
+    """(label, genome) for the latest `limit` archived champions, oldest first"""
+    champions = []
+    for generation, path in list(list_champions(directory).items())[-limit if limit else 0:]:
+        with open(path, "rb") as f:
+            champions.append((f"G{generation}", pickle.load(f)))
+    return champions
+
+
+class LiveGhosts:
+    """Ghost cars driven by archived genomes, all stepped together as one CarBatch.
+
+    Inference is one PopulationNetwork call per frame (falling back to
+    per-network activation for unsupported genomes), and state, sensors and
+    collisions are updated with CarBatch, so the cost per frame grows with
+    array length rather than with Python calls per ghost.
+    """
+
+    def __init__(self, genomes: list[tuple[str, object]], config: neat.Config, start_pose: dict,
+                 road_mask: np.ndarray, hitbox: tuple[float, float]):
+        self.labels = [label for label, _ in genomes]
+        self.nets = [neat.nn.FeedForwardNetwork.create(genome, config) for _, genome in genomes]
+        try:
+            self.population_net = PopulationNetwork(self.nets)
+        except ValueError as e:
+            print(f"  > Batched inference unavailable ({e}), activating ghosts one by one")
+            self.population_net = None
+        self.start_pose = start_pose
+        self.road_mask = road_mask
+        self.hitbox = hitbox
+        self.reset()
+
+    def reset(self):
+        pose = self.start_pose
+        self.batch = CarBatch(len(self.nets), pose["x"], pose["y"], pose["angle_deg"], *self.hitbox)
+
+    def step(self):
+        batch = self.batch
+        inputs = np.empty((len(batch), len(Car.SENSOR_ANGLES) + 1))
+        inputs[:, :-1] = batch.sensor_distances / Car.MAX_SENSOR_DISTANCE
+        inputs[:, -1] = batch.speed / 10.0
+        if self.population_net is not None:
+            outputs = self.population_net.activate(inputs, batch.alive)
+        else:
+            outputs = np.zeros((len(batch), 4))
+            for i in np.flatnonzero(batch.alive):
+                outputs[i] = self.nets[i].activate(tuple(inputs[i]))
+        batch.apply_ai_control(outputs)
+        batch.update(self.road_mask)
+
+    def poses(self) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """x, y, angle and alive of every ghost"""
+        batch = self.batch
+        return batch.x, batch.y, batch.angle, batch.alive
+
+
+class RecordedGhosts:
+    """Ghost cars replaying a recorded generation (training.py --record), one recorded frame per step"""
+
+    def __init__(self, recording, limit: int | None = None):
+        self.recording = recording
+        # The fittest cars of the generation, best first
+        self.rows = np.argsort(-recording.fitness, kind="stable")[:limit]
+        self.labels = [f"#{rank + 1}" for rank in range(len(self.rows))]
+        self.frame = 0
+
+    def reset(self):
+        self.frame = 0
+
+    def step(self):
+        self.frame = min(self.frame + 1, self.recording.frames - 1)
+
+    def poses(self) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        rec, f, rows = self.recording, self.frame, self.rows
+        return rec.x[f, rows], rec.y[f, rows], rec.angle[f, rows], rec.alive[f, rows]
@@ -0,0 +1,108 @@
+import math
+import configparser
+import numpy as np
+
+SECTION = "SuccessiveHalving"
+
+
+class HalvingSchedule:
+    """Successive-halving frame budgets for evaluating a generation.
+
+    Every car runs until the first horizon. There, only the fittest
+    keep_fraction of the cars still alive (at least min_survivors) keep
+    driving to the next horizon, and so on up to the full max_frames. Cars
+    that crash are scored as usual; retired cars get an estimate instead
+    (see HalvingRun.finish), so one generation's fitnesses stay comparable.
+    """
+
+    def __init__(self, horizons: list[int], keep_fraction: float = 0.5, min_survivors: int = 10,
+                 max_frames: int = 1000):
+        if not 0.0 < keep_fraction < 1.0:
+            raise ValueError(f"keep_fraction must be between 0 and 1, got {keep_fraction}")
+        if any(h <= 0 for h in horizons) or list(horizons) != sorted(set(horizons)):
+            raise ValueError(f"horizons must be increasing positive frame counts, got {horizons}")
+        self.horizons = [h for h in horizons if h < max_frames]
+        self.keep_fraction = keep_fraction
+        self.min_survivors = max(1, min_survivors)
+        self.max_frames = max_frames
+
+    def start(self, count: int) -> "HalvingRun":
+        return HalvingRun(self, count)
+
+    def __str__(self):
+        return (f"horizons {'/'.join(map(str, self.horizons))}/{self.max_frames} frames, "
+                f"keeping {self.keep_fraction:.0%} (at least {self.min_survivors})")
+
+
+def load_schedule(path: str, max_frames: int) -> HalvingSchedule | None:
+    """The schedule from a NEAT config file's [SuccessiveHalving] section, or None if it is missing or disabled"""
+    parser = configparser.ConfigParser()
+    parser.read(path)
+    if not parser.has_section(SECTION) or not parser.getboolean(SECTION, "enabled", fallback=False):
+        return None
+    section = parser[SECTION]
+    return HalvingSchedule([int(h) for h in section.get("horizons", "150 300 600").split()],
+                           section.getfloat("keep_fraction", 0.5), section.getint("min_survivors", 10), max_frames)
+
+
+class HalvingRun:
+    """One generation's progress through a HalvingSchedule"""
+
+    def __init__(self, schedule: HalvingSchedule, count: int):
+        self.schedule = schedule
+        self.rung = 0
+        # Per horizon reached: fitness of every car there, and the cars that kept driving and that were retired
+        self.cut_fitness = []
+        self.promoted = []
+        self.retired = []
+        self.car_frames = 0
+        self.saved_frames = 0
+        self.count = count
+
+    def due(self, frame_count: int, alive_count: int) -> bool:
+        """Count a simulated frame (0-based) with alive_count cars stepped; True if it ends the next horizon"""
+        self.car_frames += alive_count
+        horizons = self.schedule.horizons
+        return self.rung < len(horizons) and frame_count + 1 == horizons[self.rung]
+
+    def retire(self, fitness: np.ndarray, alive: np.ndarray) -> np.ndarray:
+        """At a horizon: the mask of alive cars that stop here, the least fit first on ties"""
+        horizon = self.schedule.horizons[self.rung]
+        self.rung += 1
+        candidates = np.flatnonzero(alive)
+        keep = max(math.ceil(len(candidates) * self.schedule.keep_fraction), self.schedule.min_survivors)
+        retired = np.zeros(len(fitness), dtype=bool)
+        if keep < len(candidates):
+            order = candidates[np.argsort(-fitness[candidates], kind="stable")]
+            retired[order[keep:]] = True
+        self.cut_fitness.append(np.array(fitness, dtype=np.float64))
+        self.promoted.append(alive & ~retired)
+        self.retired.append(retired)
+        # Upper bound: some of them would have crashed before max_frames
+        self.saved_frames += int(retired.sum()) * (self.schedule.max_frames - horizon)
+        return retired
+
+    def finish(self, fitness: np.ndarray) -> np.ndarray:
+        """Final fitness with retired cars extrapolated to the full budget.
+
+        Each retired car's fitness at its horizon is scaled by how much the
+        cars promoted there gained from that horizon to the end (never below
+        1). Horizons are processed last to first, so the gains of cars that
+        were promoted and later retired use their own estimates.
+        """
+        fitness = np.array(fitness, dtype=np.float64)
+        for cut, promoted, retired in reversed(list(zip(self.cut_fitness, self.promoted, self.retired))):
+            if not retired.any():
+                continue
+            measured = promoted & (cut > 0)
+            growth = fitness[measured].sum() / cut[measured].sum() if measured.any() else 1.0
+            fitness[retired] = cut[retired] * max(growth, 1.0)
+        return fitness
+
+    def report(self) -> str:
+        retired = [int(r.sum()) for r in self.retired]
+        full = self.car_frames + self.saved_frames
+        share = self.saved_frames / full if full else 0.0
+        return (f"retired {sum(retired)}/{self.count} cars ({'/'.join(map(str, retired)) or '0'} at "
+                f"{'/'.join(map(str, self.schedule.horizons[:len(retired)])) or 'no'} frames), "
+                f"{self.car_frames} car-frames simulated, up to {self.saved_frames} saved ({share:.0%})")
@@ -0,0 +1,129 @@
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+import neat
+from core.simulation import evaluate_track
+from core.sensor_lut import SensorLUT
+from core.track_cache import Track
+from core.track_bundle import open_bundle
+
+# Per-process state, set once by _init_worker
+_worker = {}
+
+
+class SharedArray:
+    """A NumPy array copied once into a named shared memory block"""
+
+    def __init__(self, array: np.ndarray):
+        self.shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        self.spec = (self.shm.name, array.shape, array.dtype.str)
+        np.ndarray(array.shape, dtype=array.dtype, buffer=self.shm.buf)[...] = array
+
+    @staticmethod
+    def attach(spec) -> tuple[shared_memory.SharedMemory, np.ndarray]:
+        name, shape, dtype = spec
+        shm = shared_memory.SharedMemory(name=name)
+        return shm, np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+def _init_worker(config, track_specs, hitbox):
+    _worker["config"] = config
+    _worker["hitbox"] = hitbox
+    # Keep the SharedMemory handles alive for as long as the views are used
+    _worker["shm"] = []
+    _worker["tracks"] = []
+    for path, bundle_path, mask_spec, field_spec, progress_spec, lut_spec, start_pose in track_specs:
+        if bundle_path is not None:
+            # Compiled tracks are mapped straight from the bundle file the parent process mapped
+            _, arrays = open_bundle(bundle_path)
+            road_mask = arrays["road_mask"]
+            distance_field = arrays["distance_field"] if field_spec else None
+            progress_index = arrays["progress"] if progress_spec else None
+        else:
+            shm, road_mask = SharedArray.attach(mask_spec)
+            _worker["shm"].append(shm)
+            distance_field = progress_index = None
+            if field_spec is not None:
+                shm, distance_field = SharedArray.attach(field_spec)
+                _worker["shm"].append(shm)
+            if progress_spec is not None:
+                shm, progress_index = SharedArray.attach(progress_spec)
+                _worker["shm"].append(shm)
+        # The LUT is already a memory-mapped file, so every worker maps the same pages
+        sensor_lut = None
+        if lut_spec is not None:
+            lut_path, cell_size, heading_step, precision = lut_spec
+            sensor_lut = SensorLUT(np.load(lut_path, mmap_mode="r"), cell_size, heading_step, precision, lut_path)
+        _worker["tracks"].append(Track(path, None, road_mask, start_pose, distance_field, sensor_lut,
+                                       progress_index=progress_index))
+
+
+def _evaluate_chunk(task):
+    track_index, genomes = task
+    config = _worker["config"]
+    nets = [neat.nn.FeedForwardNetwork.create(genome, config) for genome in genomes]
+    simulation = evaluate_track(_worker["tracks"][track_index], nets, _worker["hitbox"])
+    return simulation.fitness.tolist(), simulation.frame_count, simulation.max_fitness
+
+
+class ParallelEvaluator:
+    """Splits each generation's genomes, on each track, across a process pool of headless simulations.
+
+    Road masks (and distance fields, if any) are memory-mapped from the
+    track's compiled bundle, or copied into shared memory when there is no
+    bundle, so workers attach to them once instead of receiving the tracks
+    with every task. Cars never interact, so fitness is identical to a serial run.
+    """
+
+    def __init__(self, workers: int, config: neat.Config, tracks: list[Track], hitbox: tuple[float, float]):
+        self.workers = workers
+        self.shared = []
+        track_specs = []
+        for track in tracks:
+            mask_spec = field_spec = progress_spec = None
+            if track.bundle_path is not None:
+                field_spec = track.distance_field is not None
+                progress_spec = track.progress_index is not None
+            else:
+                self.shared.append(SharedArray(track.road_mask))
+                mask_spec = self.shared[-1].spec
+                if track.distance_field is not None:
+                    self.shared.append(SharedArray(track.distance_field))
+                    field_spec = self.shared[-1].spec
+                if track.progress_index is not None:
+                    self.shared.append(SharedArray(track.progress_index))
+                    progress_spec = self.shared[-1].spec
+            lut = track.sensor_lut
+            lut_spec = None if lut is None else (lut.path, lut.cell_size, lut.heading_step, lut.precision)
+            track_specs.append((track.path, track.bundle_path, mask_spec, field_spec, progress_spec, lut_spec,
+                                track.start_pose))
+        self.pool = multiprocessing.Pool(workers, initializer=_init_worker, initargs=(config, track_specs, hitbox))
+
+    def evaluate(self, genomes: list, track_indices=(0,)) -> tuple[np.ndarray, int, float]:
+        """Fitness of every genome on every given track as a (tracks, genomes) array,
+        plus the frames simulated (summed over tracks) and the best fitness seen"""
+        # A few chunks per worker keeps the pool busy when some chunks die out early
+        chunk_count = min(len(genomes), max(1, self.workers * 4 // len(track_indices)))
+        slices = [slice(i, None, chunk_count) for i in range(chunk_count)]
+        tasks = [(t, genomes[s]) for t in track_indices for s in slices]
+        results = self.pool.map(_evaluate_chunk, tasks)
+
+        fitness = np.zeros((len(track_indices), len(genomes)))
+        track_frames = np.zeros(len(track_indices), dtype=int)
+        max_fitness = 0.0
+        for n, (fitnesses, chunk_frames, chunk_max) in enumerate(results):
+            row = n // chunk_count
+            fitness[row, slices[n % chunk_count]] = fitnesses
+            track_frames[row] = max(track_frames[row], chunk_frames)
+            max_fitness = max(max_fitness, chunk_max)
+        return fitness, int(track_frames.sum()), max_fitness
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+        for shared in self.shared:
+            shared.close()
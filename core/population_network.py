@@ -0,0 +1,112 @@
+import numpy as np
+import neat
+from neat import activations, aggregations
+
+
+def _sigmoid(z):
+    z = np.clip(5.0 * z, -60.0, 60.0)
+    return 1.0 / (1.0 + np.exp(-z))
+
+
+def _tanh(z):
+    return np.tanh(np.clip(2.5 * z, -60.0, 60.0))
+
+
+def _relu(z):
+    return np.where(z > 0.0, z, 0.0)
+
+
+def _identity(z):
+    return z
+
+
+def _clamped(z):
+    return np.clip(z, -1.0, 1.0)
+
+
+# Vectorized twins of the neat-python activation functions we support
+ACTIVATIONS = {
+    activations.sigmoid_activation: _sigmoid,
+    activations.tanh_activation: _tanh,
+    activations.relu_activation: _relu,
+    activations.identity_activation: _identity,
+    activations.clamped_activation: _clamped,
+}
+
+
+class PopulationNetwork:
+    """All feed-forward networks of a generation compiled into one layered array program.
+
+    Every genome gets a row of node value slots (inputs first, then outputs,
+    then hidden nodes). Nodes are grouped by depth across the whole population,
+    so one activate() call runs a few gather/bincount passes per depth instead
+    of one Python FeedForwardNetwork.activate() per genome.
+    """
+
+    def __init__(self, nets: list[neat.nn.FeedForwardNetwork]):
+        self.count = len(nets)
+        self.num_inputs = len(nets[0].input_nodes) if nets else 0
+        self.num_outputs = len(nets[0].output_nodes) if nets else 0
+
+        slot_maps = []
+        levels = {}
+        for row, net in enumerate(nets):
+            slots = {key: i for i, key in enumerate(net.input_nodes + net.output_nodes)}
+            depth = {key: 0 for key in net.input_nodes}
+            for node, act_func, agg_func, bias, response, links in net.node_evals:
+                if agg_func is not aggregations.sum_aggregation:
+                    raise ValueError(f"Unsupported aggregation for batched inference: {agg_func.__name__}")
+                if act_func not in ACTIVATIONS:
+                    raise ValueError(f"Unsupported activation for batched inference: {act_func.__name__}")
+                slots.setdefault(node, len(slots))
+                depth[node] = 1 + max((depth.get(i, 0) for i, _ in links), default=0)
+                levels.setdefault(depth[node], []).append((row, node, act_func, bias, response, links))
+            slot_maps.append(slots)
+
+        self.width = max((len(s) for s in slot_maps), default=0)
+        self.output_slots = np.array([
+            [slots[key] for key in net.output_nodes] for net, slots in zip(nets, slot_maps)
+        ], dtype=np.intp).reshape(self.count, self.num_outputs)
+
+        self.levels = []
+        for d in sorted(levels):
+            node_flat, bias, response = [], [], []
+            edge_src, edge_dst, edge_weight = [], [], []
+            by_activation = {}
+            for pos, (row, node, act_func, b, r, links) in enumerate(levels[d]):
+                base = row * self.width
+                node_flat.append(base + slot_maps[row][node])
+                bias.append(b)
+                response.append(r)
+                by_activation.setdefault(ACTIVATIONS[act_func], []).append(pos)
+                # Edges keep the genome's link order so the sums match sum_aggregation exactly
+                for i, w in links:
+                    edge_src.append(base + slot_maps[row].get(i, 0))
+                    edge_dst.append(pos)
+                    edge_weight.append(w)
+            self.levels.append((
+                np.array(node_flat, dtype=np.intp),
+                np.array(bias, dtype=np.float64),
+                np.array(response, dtype=np.float64),
+                np.array(edge_src, dtype=np.intp),
+                np.array(edge_dst, dtype=np.intp),
+                np.array(edge_weight, dtype=np.float64),
+                [(fn, np.array(pos, dtype=np.intp)) for fn, pos in by_activation.items()],
+            ))
+
+    def activate(self, inputs: np.ndarray, alive: np.ndarray | None = None) -> np.ndarray:
+        """Evaluate an (n, num_inputs) input matrix; rows where alive is False come back as zeros"""
+        values = np.zeros((self.count, self.width), dtype=np.float64)
+        values[:, :self.num_inputs] = inputs
+        flat = values.ravel()
+
+        for node_flat, bias, response, edge_src, edge_dst, edge_weight, groups in self.levels:
+            sums = np.bincount(edge_dst, weights=flat[edge_src] * edge_weight, minlength=len(node_flat))
+            z = bias + response * sums
+            for fn, pos in groups:
+                flat[node_flat[pos]] = fn(z[pos])
+
+        outputs = np.take_along_axis(values, self.output_slots, axis=1)
+        if alive is not None:
+            outputs[~alive] = 0.0
+        return outputs
@@ -0,0 +1,78 @@
+import json
+import time
+import cProfile
+import numpy as np
+
+PHASES = ("inference", "physics", "sensors", "collision", "fitness", "render", "network")
+
+# The active Profiler, or None; hot paths check this once per call and skip all timing when it is None
+current = None
+
+
+class Profiler:
+    """Accumulates wall time and call counts per simulation phase.
+
+    Instrumented code reads `start = time.perf_counter()` and calls
+    add(phase, start); end_frame() turns the frame's totals into one sample
+    per phase, and end_generation() reduces those samples to percentiles,
+    appends them to the dump file (one JSON object per line) and keeps them
+    for the HUD. With cprofile=True each generation also runs under
+    cProfile and is saved next to the dump as <dump>.gen<N>.prof.
+    """
+
+    def __init__(self, dump_path: str | None = None, cprofile: bool = False):
+        self.dump_path = dump_path
+        self.cprofile = cprofile
+        self.deep = None
+        self.last_summary = {}
+        self._reset()
+
+    def _reset(self):
+        self.frame = dict.fromkeys(PHASES, 0.0)
+        self.samples = {phase: [] for phase in PHASES}
+        self.calls = dict.fromkeys(PHASES, 0)
+        self.frames = 0
+
+    def add(self, phase: str, start: float):
+        self.frame[phase] += time.perf_counter() - start
+        self.calls[phase] += 1
+
+    def end_frame(self):
+        for phase, elapsed in self.frame.items():
+            self.samples[phase].append(elapsed)
+            self.frame[phase] = 0.0
+        self.frames += 1
+
+    def start_generation(self):
+        self._reset()
+        if self.cprofile:
+            self.deep = cProfile.Profile()
+            self.deep.enable()
+
+    def end_generation(self, generation: int) -> dict:
+        """Summarize the generation, write it out and return {phase: stats}, times in ms"""
+        if self.deep is not None:
+            self.deep.disable()
+            if self.dump_path:
+                self.deep.dump_stats(f"{self.dump_path}.gen{generation}.prof")
+            self.deep = None
+
+        summary = {}
+        for phase in PHASES:
+            if not self.calls[phase]:
+                continue
+            per_frame = np.array(self.samples[phase]) * 1000.0
+            p50, p90, p99 = np.percentile(per_frame, [50, 90, 99])
+            summary[phase] = {"total_ms": float(per_frame.sum()), "calls": self.calls[phase],
+                              "p50_ms": float(p50), "p90_ms": float(p90), "p99_ms": float(p99)}
+        self.last_summary = summary
+
+        if self.dump_path:
+            with open(self.dump_path, "a") as f:
+                f.write(json.dumps({"generation": generation, "frames": self.frames, "phases": summary}) + "\n")
+        return summary
+
+    def hud_lines(self) -> list[str]:
+        """Per-frame percentiles of the last finished generation, one line per phase"""
+        return [f"{phase:9} p50 {s['p50_ms']:6.2f}  p90 {s['p90_ms']:6.2f}  p99 {s['p99_ms']:6.2f} ms"
+                for phase, s in self.last_summary.items()]
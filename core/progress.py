@@ -0,0 +1,65 @@
+import numpy as np
+
+FITNESS_MODES = ("distance", "progress")
+# A car that gains less than MIN_PROGRESS pixels of lap progress in PROGRESS_WINDOW frames is culled
+PROGRESS_WINDOW = 40
+MIN_PROGRESS = 20.0
+
+
+class ProgressTracker:
+    """Lap progress of every car from a track's progress index (see build_progress_index).
+
+    Each frame is one lookup per car: the change in index value is added to
+    the car's progress, unwrapped at the start line so laps accumulate and
+    reversing counts against it. Cars that stop gaining progress are
+    reported as stalled after PROGRESS_WINDOW frames, which replaces the
+    stopped, stagnation and spinning checks of the distance fitness.
+    """
+
+    def __init__(self, progress_index: np.ndarray, x, y, backstop: float = 3.0):
+        self.index = progress_index
+        self.lap = float(progress_index.max()) + backstop
+        self.last = self.lookup(np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64))
+        self.last[self.last < 0] = 0.0
+        self.progress = np.zeros(len(self.last))
+        self.mark = np.zeros(len(self.last))
+        self.mark_frame = np.zeros(len(self.last), dtype=np.intp)
+
+    def lookup(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        width, height = self.index.shape
+        ix = np.clip(x.astype(np.intp), 0, width - 1)
+        iy = np.clip(y.astype(np.intp), 0, height - 1)
+        return self.index[ix, iy].astype(np.float64)
+
+    def update(self, x: np.ndarray, y: np.ndarray, cars: np.ndarray, frame: int) -> np.ndarray:
+        """Advance the cars selected by the bool mask `cars`; returns the mask of those that stalled"""
+        value = self.lookup(x, y)
+        # Pixels off the index (walls, the strip behind the start line) keep the last value
+        moved = cars & (value >= 0)
+        delta = value - self.last
+        delta = np.where(delta > self.lap / 2, delta - self.lap, np.where(delta < -self.lap / 2, delta + self.lap, delta))
+        self.progress[moved] += delta[moved]
+        self.last[moved] = value[moved]
+
+        gained = cars & (self.progress >= self.mark + MIN_PROGRESS)
+        self.mark[gained] = self.progress[gained]
+        self.mark_frame[gained] = frame
+        return cars & (frame - self.mark_frame >= PROGRESS_WINDOW)
+
+    def update_car(self, i: int, x: float, y: float, frame: int) -> bool:
+        """update() for a single car, for the per-car training loop"""
+        width, height = self.index.shape
+        value = float(self.index[min(max(int(x), 0), width - 1), min(max(int(y), 0), height - 1)])
+        if value >= 0:
+            delta = value - self.last[i]
+            if delta > self.lap / 2:
+                delta -= self.lap
+            elif delta < -self.lap / 2:
+                delta += self.lap
+            self.progress[i] += delta
+            self.last[i] = value
+
+        if self.progress[i] >= self.mark[i] + MIN_PROGRESS:
+            self.mark[i] = self.progress[i]
+            self.mark_frame[i] = frame
+        return frame - self.mark_frame[i] >= PROGRESS_WINDOW
@@ -0,0 +1,102 @@
+import os
+import re
+import json
+import glob
+import numpy as np
+from core.car import Car
+from core.simulation import MAX_FRAMES
+
+RECORDING_DIR = "recordings"
+_GENERATION_NAME = re.compile(r"gen-(\d+)\.npz$")
+
+# Fixed-point scales for the int16 columns: 1/16 px positions (up to 2047 px), 1/90 degree headings
+POSITION_SCALE = 16
+ANGLE_SCALE = 90
+
+
+class TrajectoryRecorder:
+    """Records every car's state per frame and writes one compressed file per generation.
+
+    Frames go into preallocated int16/float16 buffers sized for MAX_FRAMES,
+    which are reused every generation, so memory stays constant however long
+    the run is. end_generation() hands a trimmed copy to the BackgroundWriter,
+    which compresses and writes it off the training loop.
+    """
+
+    def __init__(self, writer, directory: str = RECORDING_DIR, max_frames: int = MAX_FRAMES):
+        self.writer = writer
+        self.directory = directory
+        self.max_frames = max_frames
+        self.count = 0
+        self.frame = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def start_generation(self, count: int):
+        if count != self.count:
+            sensors = len(Car.SENSOR_ANGLES)
+            self.x = np.zeros((self.max_frames, count), dtype=np.int16)
+            self.y = np.zeros((self.max_frames, count), dtype=np.int16)
+            self.angle = np.zeros((self.max_frames, count), dtype=np.int16)
+            self.speed = np.zeros((self.max_frames, count), dtype=np.float16)
+            self.alive = np.zeros((self.max_frames, count), dtype=bool)
+            self.sensors = np.zeros((self.max_frames, count, sensors), dtype=np.float16)
+            self.count = count
+        self.frame = 0
+
+    def record(self, x, y, angle, speed, alive, sensors):
+        """Store one frame; each argument holds one value (or sensor row) per car"""
+        if self.frame >= self.max_frames:
+            return
+        f = self.frame
+        self.x[f] = np.clip(np.rint(np.asarray(x) * POSITION_SCALE), -32768, 32767)
+        self.y[f] = np.clip(np.rint(np.asarray(y) * POSITION_SCALE), -32768, 32767)
+        self.angle[f] = np.rint((np.asarray(angle) % 360) * ANGLE_SCALE)
+        self.speed[f] = speed
+        self.alive[f] = alive
+        self.sensors[f] = sensors
+        self.frame += 1
+
+    def record_cars(self, cars: list[Car]):
+        self.record([c.x for c in cars], [c.y for c in cars], [c.angle for c in cars], [c.speed for c in cars],
+                    [c.is_alive for c in cars], [c.sensor_distances for c in cars])
+
+    def end_generation(self, generation: int, fitness, track_path: str, car_scale: float):
+        frames = self.frame
+        meta = {"generation": generation, "frames": frames, "cars": self.count,
+                "track": track_path, "car_scale": car_scale,
+                "position_scale": POSITION_SCALE, "angle_scale": ANGLE_SCALE}
+        arrays = {
+            "x": self.x[:frames].copy(), "y": self.y[:frames].copy(), "angle": self.angle[:frames].copy(),
+            "speed": self.speed[:frames].copy(), "alive": self.alive[:frames].copy(),
+            "sensors": self.sensors[:frames].copy(), "fitness": np.asarray(fitness, dtype=np.float32),
+            "meta": np.array(json.dumps(meta)),
+        }
+        self.writer.submit_arrays(os.path.join(self.directory, f"gen-{generation:05d}.npz"), arrays)
+
+
+class Recording:
+    """One recorded generation, loaded from its .npz file"""
+
+    def __init__(self, path: str):
+        with np.load(path) as data:
+            self.meta = json.loads(str(data["meta"]))
+            self.x = data["x"].astype(np.float32) / self.meta["position_scale"]
+            self.y = data["y"].astype(np.float32) / self.meta["position_scale"]
+            self.angle = data["angle"].astype(np.float32) / self.meta["angle_scale"]
+            self.speed = data["speed"]
+            self.alive = data["alive"]
+            self.sensors = data["sensors"]
+            self.fitness = data["fitness"]
+        self.path = path
+        self.generation = self.meta["generation"]
+        self.frames = self.meta["frames"]
+
+
+def list_recordings(directory: str = RECORDING_DIR) -> dict[int, str]:
+    """Recorded generations in a directory as {generation: path}"""
+    paths = {}
+    for path in glob.glob(os.path.join(directory, "gen-*.npz")):
+        match = _GENERATION_NAME.search(path)
+        if match:
+            paths[int(match.group(1))] = path
+    return dict(sorted(paths.items()))
@@ -0,0 +1,137 @@
+import os
+import glob
+import math
+import hashlib
+import random
+import numpy as np
+from core.car import Car
+from core.track import build_distance_field, march_rays
+
+# Bump when the table layout or build method changes so old caches are ignored
+LUT_VERSION = 1
+
+PRECISIONS = {
+    # dtype, distance units per stored step
+    "uint8": (np.uint8, 1.0),
+    "uint16": (np.uint16, 1.0 / 256.0),
+}
+
+
+class SensorLUT:
+    """Precomputed sensor distances on a quantized (x, y, ray heading) grid.
+
+    Every Car.SENSOR_ANGLES ray is just a heading, so the table stores one
+    distance per absolute ray direction; a car's five sensors are five lookups.
+    Rays are cast from the road centroid of each cell_size x cell_size block,
+    so the error against exact casting grows with the cell size and heading step.
+    Rays grazing a wall corner flip between a near and a far hit for sub-pixel
+    moves, even with exact casting, so the max error is always large; the
+    99th percentile is what the settings control.
+    """
+
+    def __init__(self, table: np.ndarray, cell_size: int, heading_step: float, precision: str, path: str | None = None):
+        self.table = table
+        self.path = path
+        self.cell_size = cell_size
+        self.heading_step = heading_step
+        self.precision = precision
+        self.units = PRECISIONS[precision][1]
+        self.headings = table.shape[2]
+
+    @staticmethod
+    def cache_path(track_path: str, road_mask: np.ndarray, cell_size: int, heading_step: float, precision: str) -> str:
+        """LUT file next to the track PNG, keyed by the road layout and quantization settings"""
+        digest = hashlib.sha1(np.packbits(road_mask).tobytes())
+        digest.update(f"v{LUT_VERSION}:{road_mask.shape}:{cell_size}:{heading_step}:{precision}:{Car.MAX_SENSOR_DISTANCE}".encode())
+        base, _ = os.path.splitext(track_path)
+        return f"{base}.sensorlut-{digest.hexdigest()[:16]}.npy"
+
+    @staticmethod
+    def remove_cached(track_path: str):
+        """Delete every cached LUT of a track, e.g. after the map editor re-saves it"""
+        base, _ = os.path.splitext(track_path)
+        for path in glob.glob(f"{glob.escape(base)}.sensorlut-*.npy"):
+            os.remove(path)
+
+    @classmethod
+    def build(cls, road_mask: np.ndarray, cell_size: int = 2, heading_step: float = 1.0,
+              precision: str = "uint8", distance_field: np.ndarray | None = None) -> "SensorLUT":
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown LUT precision: {precision}")
+        if distance_field is None:
+            distance_field = build_distance_field(road_mask)
+
+        dtype, units = PRECISIONS[precision]
+        headings = int(round(360 / heading_step))
+        width, height = road_mask.shape
+        table = np.zeros((math.ceil(width / cell_size), math.ceil(height / cell_size), headings), dtype=dtype)
+
+        # Cast from the centroid of each cell's road pixels; cells without road stay 0
+        padded = np.zeros((table.shape[0] * cell_size, table.shape[1] * cell_size), dtype=bool)
+        padded[:width, :height] = road_mask
+        px, py = np.meshgrid(np.arange(padded.shape[0]) + 0.5, np.arange(padded.shape[1]) + 0.5, indexing="ij")
+        blocks = (table.shape[0], cell_size, table.shape[1], cell_size)
+        count = padded.reshape(blocks).sum(axis=(1, 3))
+        sum_x = (px * padded).reshape(blocks).sum(axis=(1, 3))
+        sum_y = (py * padded).reshape(blocks).sum(axis=(1, 3))
+        gx, gy = np.nonzero(count)
+        cx = sum_x[gx, gy] / count[gx, gy]
+        cy = sum_y[gx, gy] / count[gx, gy]
+
+        for h in range(headings):
+            angle_rad = math.radians(h * heading_step)
+            cos_a = np.full(len(cx), math.cos(angle_rad))
+            sin_a = np.full(len(cx), math.sin(angle_rad))
+            distances = march_rays(cx, cy, cos_a, sin_a, road_mask, distance_field)
+            table[gx, gy, h] = np.rint(distances / units)
+
+        return cls(table, cell_size, heading_step, precision)
+
+    @classmethod
+    def load_or_build(cls, track_path: str, road_mask: np.ndarray, cell_size: int = 2, heading_step: float = 1.0,
+                      precision: str = "uint8", distance_field: np.ndarray | None = None) -> "SensorLUT":
+        """Memory-map the cached LUT for this track, building and saving it first if needed"""
+        path = cls.cache_path(track_path, road_mask, cell_size, heading_step, precision)
+        if os.path.exists(path):
+            return cls(np.load(path, mmap_mode="r"), cell_size, heading_step, precision, path)
+
+        # Settings or track changed: drop stale tables before writing the new one
+        cls.remove_cached(track_path)
+        lut = cls.build(road_mask, cell_size, heading_step, precision, distance_field)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, lut.table)
+        os.replace(tmp_path, path)
+        return cls(np.load(path, mmap_mode="r"), cell_size, heading_step, precision, path)
+
+    def lookup(self, x, y, angle):
+        """Distances for rays cast from (x, y) at absolute angle(s) in degrees; scalars or arrays"""
+        width, height, _ = self.table.shape
+        ix = np.clip(np.floor_divide(x, self.cell_size).astype(np.intp), 0, width - 1)
+        iy = np.clip(np.floor_divide(y, self.cell_size).astype(np.intp), 0, height - 1)
+        h = np.rint(np.asarray(angle) / self.heading_step).astype(np.intp) % self.headings
+        return self.table[ix, iy, h] * self.units
+
+    def lookup_point(self, x: float, y: float, angles) -> list[float]:
+        """lookup() for one position and a few angles, in plain int math; array calls cost more than a ray cast here"""
+        width, height, _ = self.table.shape
+        ix = min(max(int(x // self.cell_size), 0), width - 1)
+        iy = min(max(int(y // self.cell_size), 0), height - 1)
+        item = self.table.item
+        # round() and np.rint both round halves to even, so this matches lookup() exactly
+        return [item(ix, iy, round(angle / self.heading_step) % self.headings) * self.units for angle in angles]
+
+    def measure_error(self, road_mask: np.ndarray, samples: int = 2000, seed: int = 0) -> tuple[float, float, float]:
+        """Mean, 99th percentile and max absolute error against exact Car.cast_sensor at random on-road poses"""
+        rng = random.Random(seed)
+        points = np.argwhere(road_mask)
+        car = Car()
+        errors = []
+        for _ in range(samples):
+            px, py = points[rng.randrange(len(points))]
+            car.x, car.y = px + rng.random(), py + rng.random()
+            car.angle = rng.uniform(0.0, 360.0)
+            sensor_angle = rng.choice(Car.SENSOR_ANGLES)
+            exact = car.cast_sensor(sensor_angle, road_mask)
+            errors.append(abs(exact - self.lookup_point(car.x, car.y, (car.angle + sensor_angle,))[0]))
+        return float(np.mean(errors)), float(np.percentile(errors, 99)), max(errors)
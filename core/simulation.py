@@ -0,0 +1,144 @@
+import time
+import numpy as np
+from core import profiler
+from core.car import Car
+from core.car_batch import CarBatch
+from core.population_network import PopulationNetwork
+from core.progress import ProgressTracker
+from core.halving import HalvingSchedule
+
+MAX_FRAMES = 1000
+
+
+class BatchSimulation:
+    """Headless simulation of one generation over a CarBatch.
+
+    Applies the same fitness and kill rules as NEATSimulation.step_cars, one
+    frame per step() call. It needs no display, so training, parallel workers
+    and benchmarks all share it. Given a progress index, fitness is lap
+    progress and stalled cars are culled instead. Given a HalvingSchedule,
+    the least fit cars stop at each horizon and finish() estimates their
+    fitness.
+    """
+
+    def __init__(self, batch: CarBatch, nets: list, road_mask: np.ndarray,
+                 distance_field: np.ndarray | None = None, sensor_lut=None, progress_index: np.ndarray | None = None,
+                 halving: HalvingSchedule | None = None):
+        self.batch = batch
+        self.nets = nets
+        self.road_mask = road_mask
+        self.distance_field = distance_field
+        self.sensor_lut = sensor_lut
+        try:
+            self.population_net = PopulationNetwork(nets)
+        except ValueError as e:
+            print(f"  > Batched inference unavailable ({e}), activating networks one by one")
+            self.population_net = None
+
+        self.fitness = np.zeros(len(batch))
+        self.start_x = batch.x.copy()
+        self.start_y = batch.y.copy()
+        self.history = []
+        self.progress = None if progress_index is None else ProgressTracker(progress_index, batch.x, batch.y)
+        self.halving = None if halving is None else halving.start(len(batch))
+        self.frame_count = 0
+        self.max_fitness = 0.0
+
+    def step(self) -> int:
+        """Advance one frame and return how many cars were alive at its start"""
+        batch = self.batch
+        frame_count = self.frame_count
+        self.frame_count += 1
+
+        alive = batch.alive.copy()
+        alive_count = int(alive.sum())
+        if alive_count == 0:
+            return 0
+
+        prof = profiler.current
+        if prof: start = time.perf_counter()
+        inputs = np.empty((len(batch), len(Car.SENSOR_ANGLES) + 1))
+        inputs[:, :-1] = batch.sensor_distances / Car.MAX_SENSOR_DISTANCE
+        inputs[:, -1] = batch.speed / 10.0
+
+        if self.population_net is not None:
+            outputs = self.population_net.activate(inputs, alive)
+        else:
+            outputs = np.zeros((len(batch), 4))
+            for i in np.flatnonzero(alive):
+                outputs[i] = self.nets[i].activate(tuple(inputs[i]))
+        if prof: prof.add("inference", start); start = time.perf_counter()
+        batch.apply_ai_control(outputs)
+        if prof: prof.add("physics", start)
+        batch.update(self.road_mask, self.distance_field, self.sensor_lut)
+
+        if prof: start = time.perf_counter()
+        fitness = self.fitness
+        if self.progress is not None:
+            # Kill if stalled (no lap progress for PROGRESS_WINDOW frames)
+            stalled = self.progress.update(batch.x, batch.y, alive, frame_count)
+            fitness[alive] = self.progress.progress[alive] * 0.1
+            batch.alive[stalled] = False
+        else:
+            self.apply_distance_rules(alive, frame_count)
+
+        self.max_fitness = max(self.max_fitness, float(fitness[alive].max()))
+        if self.halving is not None and self.halving.due(frame_count, alive_count):
+            batch.alive[self.halving.retire(fitness, batch.alive)] = False
+        if prof: prof.add("fitness", start)
+        return alive_count
+
+    def apply_distance_rules(self, alive: np.ndarray, frame_count: int):
+        """Fitness from distance driven, with the stopped, stagnation and spinning kill rules"""
+        batch, fitness = self.batch, self.fitness
+        fitness[alive] = batch.distance_traveled[alive] * 0.1
+
+        # Kill if stopped
+        if frame_count > 50:
+            stopped = alive & (batch.speed < 0.5)
+            batch.alive[stopped] = False
+            fitness[stopped] -= 5
+
+        # Kill if stagnated
+        if frame_count == 100:
+            dx = batch.x - self.start_x
+            dy = batch.y - self.start_y
+            stagnated = alive & ((dx**2 + dy**2)**0.5 < 50)
+            batch.alive[stagnated] = False
+            fitness[stagnated] -= 10
+
+        # Kill if spinning (Donut Detector); every car alive now was alive at all earlier checks
+        if frame_count % 60 == 0:
+            self.history.append((batch.x.copy(), batch.y.copy()))
+            if len(self.history) > 2:
+                prev_x, prev_y = self.history[-3]
+                spinning = alive & (((batch.x - prev_x)**2 + (batch.y - prev_y)**2)**0.5 < 50)
+                batch.alive[spinning] = False
+                fitness[spinning] -= 5
+
+    def run(self, max_frames: int = MAX_FRAMES) -> int:
+        """Step until every car is dead or max_frames is reached; returns frames simulated"""
+        while self.frame_count < max_frames:
+            alive_count = self.step()
+            if profiler.current:
+                profiler.current.end_frame()
+            if alive_count == 0:
+                break
+        self.finish()
+        return self.frame_count
+
+    def finish(self):
+        """Replace the fitness of cars retired by the halving schedule with their estimates"""
+        if self.halving is not None:
+            self.fitness[:] = self.halving.finish(self.fitness)
+
+
+def evaluate_track(track, nets: list, hitbox: tuple[float, float], max_frames: int = MAX_FRAMES,
+                   halving: HalvingSchedule | None = None) -> BatchSimulation:
+    """Run one generation of networks on a track from its start pose; returns the finished simulation"""
+    pose = track.start_pose
+    batch = CarBatch(len(nets), pose["x"], pose["y"], pose["angle_deg"], *hitbox)
+    simulation = BatchSimulation(batch, nets, track.road_mask, track.distance_field, track.sensor_lut,
+                                 track.progress_index, halving)
+    simulation.run(max_frames)
+    return simulation
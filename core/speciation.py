@@ -0,0 +1,326 @@
+import time
+import configparser
+import numpy as np
+import neat
+from neat.config import ConfigParameter, DefaultClassConfig
+from neat.species import Species
+
+
+class _GeneTable:
+    """One gene type (nodes or connections) of many genomes as flat arrays, grouped by genome in dict order.
+
+    Keys are matched through a sorted (genome, key) code, so one genome's
+    genes can be looked up in any set of the others with one searchsorted.
+    """
+
+    def __init__(self, owners: np.ndarray, keys: np.ndarray, values: np.ndarray, counts: np.ndarray):
+        self.keys = keys
+        self.values = values
+        self.counts = counts
+        self.starts = np.concatenate([[0], np.cumsum(counts)[:-1]]).astype(np.int64)
+        self.unique = np.unique(keys)
+        # Id len(unique) is for keys no genome here has, so it never matches
+        self.span = len(self.unique) + 1
+        codes = owners * self.span + np.searchsorted(self.unique, keys)
+        self.order = np.argsort(codes, kind="stable")
+        self.codes = codes[self.order]
+
+    def genes(self, owner: int) -> tuple[np.ndarray, np.ndarray]:
+        start = self.starts[owner]
+        return self.keys[start:start + self.counts[owner]], self.values[start:start + self.counts[owner]]
+
+    def match(self, keys: np.ndarray, owners: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """For each owner (row) and key (column): the index of the owner's gene with that key, and whether it has one"""
+        ids = np.searchsorted(self.unique, keys)
+        known = ids < len(self.unique)
+        known[known] = self.unique[ids[known]] == keys[known]
+        ids = np.where(known, ids, self.span - 1)
+        queries = owners[:, None] * self.span + ids[None, :]
+        if not len(self.codes):
+            return np.zeros(queries.shape, dtype=np.int64), np.zeros(queries.shape, dtype=bool)
+        pos = np.minimum(np.searchsorted(self.codes, queries), len(self.codes) - 1)
+        found = self.codes[pos] == queries
+        return np.where(found, self.order[pos], 0), found
+
+
+def _gene_distance(terms: np.ndarray, found: np.ndarray, count: int, lengths: np.ndarray,
+                   disjoint_coefficient: float) -> np.ndarray:
+    """(sum of homologous gene distances + disjoint penalty) / larger gene count, per other genome"""
+    terms = np.where(found, terms, 0.0)
+    # cumsum adds left to right like DefaultGenome.distance's loop, so results are bit-identical
+    total = np.cumsum(terms, axis=1)[:, -1] if count else np.zeros(len(lengths))
+    disjoint = count + lengths - 2 * found.sum(axis=1)
+    larger = np.maximum(count, lengths)
+    return np.where(larger > 0, (total + disjoint_coefficient * disjoint) / np.maximum(larger, 1), 0.0)
+
+
+class GenePool:
+    """Node and connection genes of a list of genomes as arrays, for vectorized DefaultGenome.distance.
+
+    Node values are (bias, response, time_constant, activation id,
+    aggregation id); connection values are (weight, enabled), with each
+    (input, output) key packed into one int64.
+    """
+
+    def __init__(self, genomes: list, functions: dict | None = None):
+        self.functions = {} if functions is None else functions
+        intern = self.functions.setdefault
+        node_owners, node_keys, node_values = [], [], []
+        conn_owners, conn_keys, conn_values = [], [], []
+        node_counts, conn_counts = [], []
+        for owner, genome in enumerate(genomes):
+            node_counts.append(len(genome.nodes))
+            node_owners += [owner] * len(genome.nodes)
+            node_keys += genome.nodes.keys()
+            node_values += [(n.bias, n.response, n.time_constant, intern(n.activation, len(self.functions)),
+                             intern(n.aggregation, len(self.functions))) for n in genome.nodes.values()]
+            conn_counts.append(len(genome.connections))
+            conn_owners += [owner] * len(genome.connections)
+            # Outputs are never negative, so input * 2**32 + output is unique
+            conn_keys += [i * (1 << 32) + o for i, o in genome.connections]
+            conn_values += [(c.weight, c.enabled) for c in genome.connections.values()]
+        self.nodes = _GeneTable(np.array(node_owners, dtype=np.int64), np.array(node_keys, dtype=np.int64),
+                                np.array(node_values, dtype=np.float64).reshape(-1, 5),
+                                np.array(node_counts, dtype=np.int64))
+        self.connections = _GeneTable(np.array(conn_owners, dtype=np.int64), np.array(conn_keys, dtype=np.int64),
+                                      np.array(conn_values, dtype=np.float64).reshape(-1, 2),
+                                      np.array(conn_counts, dtype=np.int64))
+
+    def distances(self, genes: "GenePool", owner: int, others: np.ndarray, genome_config) -> np.ndarray:
+        """DefaultGenome.distance(genome, other) from genome `owner` of `genes` to each of `others` in this pool"""
+        weight_coefficient = genome_config.compatibility_weight_coefficient
+        disjoint_coefficient = genome_config.compatibility_disjoint_coefficient
+
+        # A padding row keeps the gather valid when this pool has no genes; unmatched genes are masked out anyway
+        keys, own = genes.nodes.genes(owner)
+        index, found = self.nodes.match(keys, others)
+        values = np.concatenate([self.nodes.values, np.zeros((1, 5))])[index]
+        d = np.abs(own[:, 0] - values[..., 0]) + np.abs(own[:, 1] - values[..., 1])
+        d = d + np.abs(own[:, 2] - values[..., 2])
+        d = d + (own[:, 3] != values[..., 3])
+        d = d + (own[:, 4] != values[..., 4])
+        node_distance = _gene_distance(d * weight_coefficient, found, len(keys), self.nodes.counts[others],
+                                       disjoint_coefficient)
+
+        keys, own = genes.connections.genes(owner)
+        index, found = self.connections.match(keys, others)
+        values = np.concatenate([self.connections.values, np.zeros((1, 2))])[index]
+        d = np.abs(own[:, 0] - values[..., 0]) + (own[:, 1] != values[..., 1])
+        connection_distance = _gene_distance(d * weight_coefficient, found, len(keys),
+                                             self.connections.counts[others], disjoint_coefficient)
+        return node_distance + connection_distance
+
+
+class _DistanceRows:
+    """One generation's compatibility distances, as one row over the sorted population per comparing genome.
+
+    Stands in for neat's GenomeDistanceCache: a pair already requested the
+    other way round returns that value, so every distance is the one the
+    default species set would use. Values computed in a genome's own
+    direction can be cached for the next generation.
+    """
+
+    def __init__(self, population: dict, genome_config, cache: dict):
+        self.genome_config = genome_config
+        self.cache = cache
+        self.keys = np.array(sorted(population), dtype=np.int64)
+        self.index = {key: j for j, key in enumerate(self.keys.tolist())}
+        self.pool = GenePool([population[key] for key in self.keys.tolist()])
+        # Per comparing genome: its key, its position in the population (-1 if outside), distances to
+        # self.keys (NaN where not requested) and whether each was computed in this direction
+        self.row_keys = []
+        self.positions = []
+        self.rows = np.full((16, len(self.keys)), np.nan)
+        self.direct = np.zeros(self.rows.shape, dtype=bool)
+        self.computed = 0
+        self.reused = 0
+        self.batches = 0
+
+    def _row(self, genome) -> int:
+        if genome.key in self.row_keys:
+            return self.row_keys.index(genome.key)
+        if len(self.row_keys) == len(self.rows):
+            self.rows = np.concatenate([self.rows, np.full(self.rows.shape, np.nan)])
+            self.direct = np.concatenate([self.direct, np.zeros(self.direct.shape, dtype=bool)])
+        self.row_keys.append(genome.key)
+        self.positions.append(self.index.get(genome.key, -1))
+        return len(self.row_keys) - 1
+
+    def request(self, genome, columns: np.ndarray) -> np.ndarray:
+        """Distances from genome to the population genomes at the given (ascending) positions"""
+        r = self._row(genome)
+        row, direct = self.rows[r], self.direct[r]
+
+        # Pairs requested the other way round earlier this generation keep that value
+        own = self.positions[r]
+        if own >= 0:
+            positions = np.array(self.positions)
+            earlier = self.rows[:len(positions), own]
+            reverse = (positions >= 0) & ~np.isnan(earlier)
+            reverse[r] = False
+            reverse[reverse] = np.isnan(row[positions[reverse]])
+            row[positions[reverse]] = earlier[reverse]
+
+        missing = columns[np.isnan(row[columns])]
+        cached = self.cache.get(genome.key)
+        if cached is not None and len(cached[0]) and len(missing):
+            cached_keys, cached_values = cached
+            pos = np.minimum(np.searchsorted(cached_keys, self.keys[missing]), len(cached_keys) - 1)
+            hit = cached_keys[pos] == self.keys[missing]
+            row[missing[hit]] = cached_values[pos[hit]]
+            direct[missing[hit]] = True
+            self.reused += int(hit.sum())
+            missing = missing[~hit]
+        if len(missing):
+            if own >= 0:
+                genes, owner = self.pool, own
+            else:
+                genes, owner = GenePool([genome], self.pool.functions), 0
+            row[missing] = self.pool.distances(genes, owner, missing, self.genome_config)
+            direct[missing] = True
+            self.computed += len(missing)
+            self.batches += 1
+        return row[columns]
+
+    def cacheable(self) -> dict:
+        """genome key -> (sorted keys, distances) of every value computed in that genome's direction"""
+        cache = {}
+        for r, key in enumerate(self.row_keys):
+            if self.positions[r] >= 0:
+                columns = np.flatnonzero(self.direct[r])
+                cache[key] = (self.keys[columns], self.rows[r, columns])
+        return cache
+
+    def summary(self) -> tuple[float, float] | None:
+        """Mean and standard deviation over the pairs GenomeDistanceCache would hold: both orders of each pair"""
+        if not self.row_keys:
+            return None
+        rows = self.rows[:len(self.row_keys)]
+        r, columns = np.nonzero(~np.isnan(rows))
+        first, second = np.array(self.row_keys, dtype=np.int64)[r], self.keys[columns]
+        values = rows[r, columns]
+        # Genome keys fit in 32 bits, so each unordered pair packs into one int64
+        low, high = np.minimum(first, second), np.maximum(first, second)
+        _, unique = np.unique(low * (1 << 32) + high, return_index=True)
+        weights = np.where(low[unique] == high[unique], 1.0, 2.0)
+        values = values[unique]
+        mean = float(np.sum(values * weights) / weights.sum())
+        return mean, float(np.sqrt(np.sum((values - mean) ** 2 * weights) / weights.sum()))
+
+
+class CachedSpeciesSet(neat.DefaultSpeciesSet):
+    """DefaultSpeciesSet with vectorized compatibility distances that are cached across generations.
+
+    The population's genes are encoded once per generation into flat
+    arrays. Each genome that speciation compares against the others (old
+    and new representatives) gets its distances to all of them in one
+    array pass instead of one Python gene loop per pair. Genomes are
+    scanned in the same order with the same tie-breaking, so species,
+    members and representatives are identical to DefaultSpeciesSet.
+    Genomes never change once created, so distances from surviving
+    representatives to surviving genomes (elites) are reused in the next
+    generation.
+
+    Selected by naming the config section [CachedSpeciesSet] (see load_config).
+    """
+
+    def __init__(self, config, reporters):
+        super().__init__(config, reporters)
+        self.distance_cache = {}
+
+    @classmethod
+    def parse_config(cls, param_dict):
+        return DefaultClassConfig(param_dict,
+                                  [ConfigParameter('compatibility_threshold', float)],
+                                  'CachedSpeciesSet')
+
+    def speciate(self, config, population, generation):
+        """DefaultSpeciesSet.speciate over distance rows"""
+        assert isinstance(population, dict)
+        start = time.perf_counter()
+        compatibility_threshold = self.species_set_config.compatibility_threshold
+        distances = _DistanceRows(population, config.genome_config, self.distance_cache)
+        keys = distances.keys.tolist()
+        unspeciated = np.ones(len(keys), dtype=bool)
+
+        # Each existing species keeps the unspeciated genome closest to its old representative (first on ties)
+        new_representatives = {}
+        new_members = {}
+        for sid in sorted(self.species.keys()):
+            columns = np.flatnonzero(unspeciated)
+            if not len(columns):
+                raise ValueError("More species than genomes to represent them")
+            row = distances.request(self.species[sid].representative, columns)
+            j = columns[int(np.argmin(row))]
+            new_representatives[sid] = keys[j]
+            new_members[sid] = [keys[j]]
+            unspeciated[j] = False
+
+        # The rest join the closest representative under the threshold, in id order, or found a new species
+        columns = np.flatnonzero(unspeciated)
+        sids = list(new_representatives)
+        matrix = np.full((max(len(sids), 16), len(keys)), np.inf)
+        for r, sid in enumerate(sids):
+            matrix[r, columns] = distances.request(population[new_representatives[sid]], columns)
+        for n, j in enumerate(columns.tolist()):
+            column = matrix[:len(sids), j]
+            below = column < compatibility_threshold
+            if below.any():
+                sid = sids[int(np.argmin(np.where(below, column, np.inf)))]
+                new_members[sid].append(keys[j])
+            else:
+                sid = next(self.indexer)
+                new_representatives[sid] = keys[j]
+                new_members[sid] = [keys[j]]
+                if len(sids) == len(matrix):
+                    matrix = np.concatenate([matrix, np.full(matrix.shape, np.inf)])
+                later = columns[n + 1:]
+                matrix[len(sids), later] = distances.request(population[keys[j]], later)
+                sids.append(sid)
+
+        self.genome_to_species = {}
+        for sid in sorted(new_representatives.keys()):
+            rid = new_representatives[sid]
+            s = self.species.get(sid)
+            if s is None:
+                s = Species(sid, generation)
+                self.species[sid] = s
+
+            members = new_members[sid]
+            for gid in members:
+                self.genome_to_species[gid] = sid
+
+            member_dict = {gid: population[gid] for gid in members}
+            s.update(population[rid], member_dict)
+
+        # Only this population (which includes the new representatives) can be compared next generation
+        self.distance_cache = distances.cacheable()
+
+        summary = distances.summary() if len(population) > 1 else None
+        if summary is not None:
+            self.reporters.info(f'Mean genetic distance {summary[0]:.3f}, standard deviation {summary[1]:.3f}')
+        self.reporters.info(
+            f'Speciation: {(time.perf_counter() - start) * 1000:.1f} ms, {distances.computed} distances computed '
+            f'in {distances.batches} batches, {distances.reused} reused from the previous generation')
+
+    def __getstate__(self):
+        # The cache is only a speed-up; keep it out of checkpoints
+        state = self.__dict__.copy()
+        state["distance_cache"] = {}
+        return state
+
+
+# Species sets a config file can select by naming its section after the class
+SPECIES_SETS = {cls.__name__: cls for cls in (neat.DefaultSpeciesSet, CachedSpeciesSet)}
+
+
+def load_config(path: str) -> neat.Config:
+    """neat.Config for the project's genome, reproduction and stagnation types, with the species set
+    chosen by which SPECIES_SETS section the file has"""
+    parser = configparser.ConfigParser()
+    parser.read(path)
+    names = [name for name in SPECIES_SETS if parser.has_section(name)]
+    if len(names) != 1:
+        raise ValueError(f"{path} needs exactly one species set section out of {', '.join(SPECIES_SETS)}")
+    return neat.Config(neat.DefaultGenome, neat.DefaultReproduction,
+                       SPECIES_SETS[names[0]], neat.DefaultStagnation, path)
@@ -0,0 +1,60 @@
+import os
+import time
+import neat
+from neat.math_util import mean, stdev
+from core.checkpoint import BackgroundWriter
+
+CSV_COLUMNS = ["generation", "max_fitness", "avg_fitness", "std_dev", "wall_time", "frames", "evals_per_sec", "species"]
+
+
+class CSVStatsReporter(neat.reporting.BaseReporter):
+    """Streams one CSV row per generation instead of keeping history in memory.
+
+    The first four columns match the bundled assets/*.csv files; wall_time is
+    seconds since the run started, frames comes from get_frames() (a running
+    total of simulated frames) and evals_per_sec is genomes evaluated per
+    second of that generation. Rows go through the BackgroundWriter, so the
+    training loop never waits on the file.
+
+    When resuming at resume_generation, rows past that generation (which
+    are about to be re-run) are dropped and wall_time carries on.
+    """
+
+    def __init__(self, writer: BackgroundWriter, path: str, get_frames=None, resume_generation: int | None = None):
+        self.writer = writer
+        self.path = path
+        self.get_frames = get_frames or (lambda: 0)
+        self.generation_start = time.perf_counter()
+        self.frames_start = 0
+        self.generation = 0
+
+        rows = []
+        if resume_generation is not None and os.path.exists(path):
+            with open(path, "r") as f:
+                rows = [line for line in f.readlines()[1:] if int(line.split(",", 1)[0]) <= resume_generation]
+        previous_time = float(rows[-1].split(",")[CSV_COLUMNS.index("wall_time")]) if rows else 0.0
+        self.start_time = self.generation_start - previous_time
+        with open(path, "w") as f:
+            f.write(",".join(CSV_COLUMNS) + "\n")
+            f.writelines(rows)
+
+    def start_generation(self, generation):
+        self.generation = generation
+        self.generation_start = time.perf_counter()
+        self.frames_start = self.get_frames()
+
+    def post_evaluate(self, config, population, species, best_genome):
+        now = time.perf_counter()
+        fitnesses = [genome.fitness for genome in population.values()]
+        elapsed = max(now - self.generation_start, 1e-9)
+        row = [
+            self.generation + 1,
+            max(fitnesses),
+            mean(fitnesses),
+            stdev(fitnesses),
+            f"{now - self.start_time:.3f}",
+            self.get_frames() - self.frames_start,
+            f"{len(fitnesses) / elapsed:.1f}",
+            len(species.species),
+        ]
+        self.writer.append(self.path, (",".join(str(value) for value in row) + "\n").encode())
@@ -0,0 +1,171 @@
+import math
+import numpy as np
+import pygame
+from core.car import Car, march_ray
+
+
+def build_road_mask(track_surface: pygame.Surface, road_color: tuple[int, int, int] = Car.ROAD_COLOR) -> np.ndarray:
+    """Convert a track surface into a (width, height) bool array that is True on road pixels"""
+    rgb = pygame.surfarray.array3d(track_surface)
+    return np.all(rgb == np.array(road_color, dtype=rgb.dtype), axis=2)
+
+
+def build_distance_field(road_mask: np.ndarray, max_distance: float = Car.MAX_SENSOR_DISTANCE) -> np.ndarray:
+    """Euclidean distance from every pixel centre to the nearest wall pixel centre.
+
+    Everything outside the image counts as wall. Distances are clamped to
+    max_distance + 1, which keeps the field a safe lower bound for raymarching
+    while bounding the cost of the transform.
+    """
+    cap = int(math.ceil(max_distance)) + 1
+    walls = np.ones((road_mask.shape[0] + 2, road_mask.shape[1] + 2), dtype=bool)
+    walls[1:-1, 1:-1] = ~road_mask
+    width, height = walls.shape
+
+    # Pass 1: distance to the nearest wall within each column
+    column = np.empty(walls.shape, dtype=np.float64)
+    column[:, 0] = np.where(walls[:, 0], 0.0, cap)
+    for y in range(1, height):
+        column[:, y] = np.where(walls[:, y], 0.0, np.minimum(column[:, y - 1] + 1.0, cap))
+    for y in range(height - 2, -1, -1):
+        column[:, y] = np.minimum(column[:, y], column[:, y + 1] + 1.0)
+
+    # Pass 2: combine columns along each row, min over dx of column(x + dx)^2 + dx^2
+    squared = column ** 2
+    best = squared.copy()
+    for dx in range(1, min(cap, width)):
+        offset = float(dx * dx)
+        np.minimum(best[dx:], squared[:-dx] + offset, out=best[dx:])
+        np.minimum(best[:-dx], squared[dx:] + offset, out=best[:-dx])
+
+    return np.sqrt(np.minimum(best[1:-1, 1:-1], cap * cap)).astype(np.float32)
+
+
+# A NumPy pass costs about as much as stepping a few dozen rays in plain Python, so march_rays
+# finishes the last MARCH_TAIL unfinished rays one by one
+MARCH_TAIL = 32
+
+
+def march_rays(ox: np.ndarray, oy: np.ndarray, cos_a: np.ndarray, sin_a: np.ndarray,
+               road_mask: np.ndarray, distance_field: np.ndarray, max_distance: float = Car.MAX_SENSOR_DISTANCE) -> np.ndarray:
+    """Vectorized Car._march_sensor: sphere-trace many rays at once, advancing the unfinished ones each pass"""
+    t = np.zeros(len(ox), dtype=np.float64)
+    ix = np.floor(ox).astype(np.intp)
+    iy = np.floor(oy).astype(np.intp)
+    step_x = np.where(cos_a > 0, 1, -1)
+    step_y = np.where(sin_a > 0, 1, -1)
+    # Pixel edge each ray leaves through, relative to the pixel index
+    edge_x = (cos_a > 0).astype(np.intp)
+    edge_y = (sin_a > 0).astype(np.intp)
+    width, height = road_mask.shape
+
+    active = np.arange(len(ox))
+    while len(active) > MARCH_TAIL:
+        cx, cy = ix[active], iy[active]
+        inside = (cx >= 0) & (cy >= 0) & (cx < width) & (cy < height)
+        done = ~inside
+        done[inside] = ~road_mask[cx[inside], cy[inside]]
+
+        keep = ~done
+        active, cx, cy = active[keep], cx[keep], cy[keep]
+        step = distance_field[cx, cy].astype(np.float64) - Car.MARCH_MARGIN
+
+        jump = step >= 1.0
+        far = active[jump]
+        t[far] += step[jump]
+        ix[far] = np.floor(ox[far] + cos_a[far] * t[far]).astype(np.intp)
+        iy[far] = np.floor(oy[far] + sin_a[far] * t[far]).astype(np.intp)
+
+        # Close to a wall: move exactly into the next pixel the ray enters (DDA step)
+        near = active[~jump]
+        c, s = cos_a[near], sin_a[near]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            tx = np.where(c != 0, (ix[near] + edge_x[near] - ox[near]) / c, math.inf)
+            ty = np.where(s != 0, (iy[near] + edge_y[near] - oy[near]) / s, math.inf)
+        cross_x = tx < ty
+        ix[near[cross_x]] += step_x[near[cross_x]]
+        iy[near[~cross_x]] += step_y[near[~cross_x]]
+        t[near] = np.maximum(t[near], np.minimum(tx, ty))
+
+        active = active[t[active] < max_distance]
+
+    # Rays near walls advance a pixel per pass, so without this a few stragglers cost dozens of passes
+    for i in active.tolist():
+        t[i] = march_ray(float(ox[i]), float(oy[i]), float(cos_a[i]), float(sin_a[i]), road_mask, distance_field,
+                         max_distance, float(t[i]), (int(ix[i]), int(iy[i])))
+    return np.minimum(t, max_distance)
+
+
+def find_start_pose(road_mask: np.ndarray, distance_field: np.ndarray | None = None, heading_step: float = 3.0) -> dict:
+    """Deterministic start pose for tracks without a saved one: the widest road point, facing its longest clear ray"""
+    if distance_field is None:
+        distance_field = build_distance_field(road_mask)
+    x, y = np.unravel_index(np.argmax(np.where(road_mask, distance_field, -1)), road_mask.shape)
+    angles = np.arange(0, 360, heading_step)
+    angle_rad = np.radians(angles)
+    distances = march_rays(np.full(len(angles), x + 0.5), np.full(len(angles), y + 0.5),
+                           np.cos(angle_rad), np.sin(angle_rad), road_mask, distance_field)
+    return {"x": int(x), "y": int(y), "angle_deg": float(angles[np.argmax(distances)])}
+
+
+def build_progress_index(road_mask: np.ndarray, start_pose: dict, backstop: float = 3.0) -> np.ndarray:
+    """Path length along the road from the start line, in the start heading's direction, for every pixel.
+
+    A thin wall just behind the start line makes the front go all the way
+    round a loop instead of spreading both ways, so progress rises steadily
+    over a lap and the highest value is reached just behind the start.
+    The front alternates 4- and 8-neighbour steps, an octagonal
+    approximation of Euclidean path length within about 8%.
+    Off-road and unreachable pixels are -1.
+    """
+    width, height = road_mask.shape
+    x0, y0 = start_pose["x"], start_pose["y"]
+    angle_rad = math.radians(start_pose["angle_deg"])
+    fx, fy = math.cos(angle_rad), math.sin(angle_rad)
+    nx, ny = -fy, fx
+
+    def on_road(x: float, y: float) -> bool:
+        ix, iy = int(math.floor(x)), int(math.floor(y))
+        return 0 <= ix < width and 0 <= iy < height and road_mask[ix, iy]
+
+    # Road extent across the start line, one pixel into the walls on either side
+    extent = []
+    for sign in (-1, 1):
+        t = 0.0
+        while t < width + height and on_road(x0 + sign * t * nx, y0 + sign * t * ny):
+            t += 0.5
+        extent.append(t + 1.0)
+    across = np.arange(-extent[0], extent[1] + 0.5, 0.5)
+
+    def line(offset: float) -> np.ndarray:
+        px = np.floor(x0 + across * nx + offset * fx).astype(np.intp)
+        py = np.floor(y0 + across * ny + offset * fy).astype(np.intp)
+        inside = (px >= 0) & (py >= 0) & (px < width) & (py < height)
+        index = px[inside] * height + py[inside]
+        return np.unique(index[road_mask.ravel()[index]])
+
+    frontier = line(0.0)
+    open_ = road_mask.ravel().copy()
+    for offset in np.arange(-0.5, -backstop - 0.5, -0.5):
+        open_[line(offset)] = False
+    open_[frontier] = True
+    progress = np.full(width * height, -1.0, dtype=np.float32)
+    progress[frontier] = 0.0
+    open_[frontier] = False
+
+    straight = ((1, 0), (-1, 0), (0, 1), (0, -1))
+    diagonal = straight + ((1, 1), (1, -1), (-1, 1), (-1, -1))
+    step = 0
+    while len(frontier):
+        step += 1
+        x, y = np.divmod(frontier, height)
+        reached = []
+        for dx, dy in (diagonal if step % 2 else straight):
+            cx, cy = x + dx, y + dy
+            inside = (cx >= 0) & (cy >= 0) & (cx < width) & (cy < height)
+            reached.append(cx[inside] * height + cy[inside])
+        frontier = np.unique(np.concatenate(reached))
+        frontier = frontier[open_[frontier]]
+        open_[frontier] = False
+        progress[frontier] = step
+    return progress.reshape(width, height)
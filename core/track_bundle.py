@@ -0,0 +1,73 @@
+import os
+import json
+import struct
+import hashlib
+import numpy as np
+
+# Bump when the layout or any stored array changes meaning so old bundles are recompiled
+BUNDLE_VERSION = 2
+MAGIC = b"NEATTRK\0"
+ALIGNMENT = 64
+_HEADER_SIZE = struct.Struct("<I")
+
+
+def _aligned(size: int) -> int:
+    return -(-size // ALIGNMENT) * ALIGNMENT
+
+
+def bundle_path(track_path: str) -> str:
+    """Compiled bundle next to the track PNG, e.g. assets/track.png -> assets/track.bundle"""
+    return os.path.splitext(track_path)[0] + ".bundle"
+
+
+def content_hash(track_path: str, pose_path: str | None = None) -> str:
+    """Hash of the source files a bundle is compiled from: the PNG and, if present, start_pose.json"""
+    digest = hashlib.sha1(f"v{BUNDLE_VERSION}".encode())
+    with open(track_path, "rb") as f:
+        digest.update(f.read())
+    if pose_path and os.path.exists(pose_path):
+        with open(pose_path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def write_bundle(path: str, arrays: dict[str, np.ndarray], meta: dict):
+    """Write a JSON header followed by each array's raw bytes at an aligned offset.
+
+    The raw layout is what lets open_bundle memory-map every array in place
+    instead of decoding it.
+    """
+    specs, size = {}, 0
+    for name, array in arrays.items():
+        specs[name] = [size, array.dtype.str, list(array.shape)]
+        size += _aligned(array.nbytes)
+    header = json.dumps({**meta, "arrays": specs}).encode()
+    data_start = _aligned(len(MAGIC) + _HEADER_SIZE.size + len(header))
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC + _HEADER_SIZE.pack(len(header)) + header)
+        for name, array in arrays.items():
+            f.seek(data_start + specs[name][0])
+            f.write(np.ascontiguousarray(array).tobytes())
+        f.truncate(data_start + size)
+    os.replace(tmp_path, path)
+
+
+def open_bundle(path: str) -> tuple[dict, dict[str, np.ndarray]] | None:
+    """The header and read-only memory maps of every array, or None if the file is missing or unreadable.
+
+    Pages are shared by every process that maps the same bundle.
+    """
+    try:
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return None
+            (size,) = _HEADER_SIZE.unpack(f.read(_HEADER_SIZE.size))
+            header = json.loads(f.read(size))
+    except (OSError, ValueError, struct.error):
+        return None
+    data_start = _aligned(len(MAGIC) + _HEADER_SIZE.size + size)
+    arrays = {name: np.memmap(path, dtype=np.dtype(dtype), mode="r", offset=data_start + offset, shape=tuple(shape))
+              for name, (offset, dtype, shape) in header["arrays"].items()}
+    return header, arrays
@@ -0,0 +1,132 @@
+import os
+import json
+import pygame
+from core.track import build_road_mask, build_distance_field, find_start_pose, build_progress_index
+from core.track_bundle import BUNDLE_VERSION, bundle_path, content_hash, write_bundle, open_bundle
+from core.sensor_lut import SensorLUT
+
+ASSETS_DIR = "assets"
+DEFAULT_TRACK = os.path.join(ASSETS_DIR, "track.png")
+POSE_PATH = os.path.join(ASSETS_DIR, "start_pose.json")
+
+# Preprocessed tracks keyed by (path, modification time, sensor engine, LUT options)
+_tracks = {}
+
+
+class Track:
+    """A track image decoded and preprocessed once.
+
+    Holds everything a simulation needs: the surface for drawing, the road
+    mask, the optional distance field, sensor LUT or progress index, and the
+    start pose. bundle_path is set when the arrays are memory-mapped from a compiled bundle.
+    """
+
+    def __init__(self, path: str, surface: pygame.Surface, road_mask, start_pose: dict,
+                 distance_field=None, sensor_lut: SensorLUT | None = None, bundle_path: str | None = None,
+                 progress_index=None):
+        self.path = path
+        self.bundle_path = bundle_path
+        self.surface = surface
+        self.road_mask = road_mask
+        self.start_pose = start_pose
+        self.distance_field = distance_field
+        self.sensor_lut = sensor_lut
+        self.progress_index = progress_index
+
+    @property
+    def name(self) -> str:
+        return os.path.splitext(os.path.basename(self.path))[0]
+
+
+def resolve_track(name: str) -> str:
+    """Accept a track path or a bare name from assets/, e.g. "hard2" """
+    if os.path.exists(name):
+        return name
+    return os.path.join(ASSETS_DIR, name if name.endswith(".png") else f"{name}.png")
+
+
+def load_start_pose(track_path: str, road_mask, distance_field=None) -> dict:
+    """Start pose of a track from start_pose.json, falling back to find_start_pose.
+
+    The top-level x/y/angle_deg entry belongs to track.png, as written by
+    the map editor; other tracks are listed by file name under "tracks".
+    """
+    data = {}
+    if os.path.exists(POSE_PATH):
+        with open(POSE_PATH, "r") as f:
+            data = json.load(f)
+
+    file_name = os.path.basename(track_path)
+    if os.path.abspath(track_path) == os.path.abspath(DEFAULT_TRACK):
+        if "x" in data:
+            return {"x": data["x"], "y": data["y"], "angle_deg": data["angle_deg"]}
+        return {"x": 500, "y": 350, "angle_deg": 0}
+    if file_name in data.get("tracks", {}):
+        return data["tracks"][file_name]
+
+    pose = find_start_pose(road_mask, distance_field)
+    print(f"  > No start pose saved for {file_name}, using ({pose['x']}, {pose['y']}) at {pose['angle_deg']:.0f}°")
+    return pose
+
+
+def compile_track(path: str) -> tuple[dict, dict, str | None]:
+    """Decode the PNG, derive the road mask, distance field, start pose and progress index, and write them as a bundle.
+
+    Returns the bundle header, its arrays and the bundle path; if the bundle
+    cannot be written the in-memory arrays are returned with no path.
+    """
+    surface = pygame.image.load(path)
+    road_mask = build_road_mask(surface)
+    distance_field = build_distance_field(road_mask)
+    start_pose = load_start_pose(path, road_mask, distance_field)
+    meta = {"version": BUNDLE_VERSION, "hash": content_hash(path, POSE_PATH), "source": os.path.basename(path),
+            "start_pose": start_pose}
+    # Row-major RGB, the layout pygame.image.frombuffer expects
+    arrays = {"pixels": pygame.surfarray.array3d(surface).transpose(1, 0, 2), "road_mask": road_mask,
+              "distance_field": distance_field, "progress": build_progress_index(road_mask, start_pose)}
+    target = bundle_path(path)
+    try:
+        write_bundle(target, arrays, meta)
+    except OSError as e:
+        print(f"  > Could not write track bundle {target}: {e}")
+        return meta, arrays, None
+    meta, arrays = open_bundle(target)
+    return meta, arrays, target
+
+
+def load_bundle(path: str) -> tuple[dict, dict, str | None]:
+    """Memory-map the track's bundle, recompiling it first if it is missing or older than the PNG or poses"""
+    target = bundle_path(path)
+    bundle = open_bundle(target)
+    if bundle is not None and bundle[0].get("hash") == content_hash(path, POSE_PATH):
+        return *bundle, target
+    return compile_track(path)
+
+
+def load_track(path: str, sensor_engine: str = "grid", lut_options: dict | None = None,
+               fitness: str = "distance") -> Track:
+    """Load a preprocessed track from its bundle, or return the cached copy if the file is unchanged"""
+    lut_options = lut_options or {}
+    key = (os.path.abspath(path), os.path.getmtime(path), sensor_engine, tuple(sorted(lut_options.items())), fitness)
+    track = _tracks.get(key)
+    if track is not None:
+        return track
+
+    meta, arrays, source = load_bundle(path)
+    road_mask = arrays["road_mask"]
+    surface = pygame.image.frombuffer(arrays["pixels"], road_mask.shape, "RGB")
+    distance_field = None
+    sensor_lut = None
+    if sensor_engine == "distance-field":
+        distance_field = arrays["distance_field"]
+    elif sensor_engine == "lut":
+        sensor_lut = SensorLUT.load_or_build(path, road_mask, distance_field=arrays["distance_field"], **lut_options)
+        mean_error, p99_error, max_error = sensor_lut.measure_error(road_mask)
+        # The max comes from rays grazing wall corners, which jump for sub-pixel moves even when cast exactly
+        print(f"Sensor LUT {os.path.basename(sensor_lut.path)}: error vs exact casting "
+              f"mean {mean_error:.2f}px, p99 {p99_error:.1f}px, max {max_error:.0f}px")
+
+    progress_index = arrays["progress"] if fitness == "progress" else None
+    track = _tracks[key] = Track(path, surface, road_mask, meta["start_pose"], distance_field, sensor_lut, source,
+                                 progress_index)
+    return track
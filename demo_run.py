@@ -1,15 +1,37 @@
 import sys
 import os
-import json
 import pickle
 import math
+import argparse
+import numpy as np
 import pygame
 import neat
 from core.car import Car
+from core.track_cache import DEFAULT_TRACK, POSE_PATH, load_track
+from core.ghosts import CHAMPION_DIR, LiveGhosts, RecordedGhosts, load_champions
+from core.checkpoint import CHECKPOINT_DIR, list_checkpoints, load_population
+from core.speciation import load_config
+from core.recording import RECORDING_DIR, Recording, list_recordings
 from ui.visualizer import draw_network
+from render.dirty_renderer import DirtyRenderer
+
+GHOST_MODES = ("champions", "population", "recording")
+GHOST_DIRS = {"champions": CHAMPION_DIR, "population": CHECKPOINT_DIR, "recording": RECORDING_DIR}
+GHOST_TINT = (60, 110, 255)
+GHOST_ALPHA = 150
+MAX_GHOSTS = 300
+# Name tags are drawn by default only for fields small enough to stay readable
+MAX_LABELED_GHOSTS = 30
 
 class DemoRunner:
-    def __init__(self):
+    def __init__(self, ghost_mode: str | None = None, ghost_dir: str | None = None, generation: int | None = None,
+                 max_ghosts: int = MAX_GHOSTS):
+        if ghost_mode is not None and ghost_mode not in GHOST_MODES:
+            raise ValueError(f"Unknown ghost mode: {ghost_mode}")
+        self.ghost_mode = ghost_mode
+        self.ghost_dir = ghost_dir or GHOST_DIRS.get(ghost_mode)
+        self.ghost_generation = generation
+        self.max_ghosts = max_ghosts
         pygame.init()
         self.load_track()
         self.screen = pygame.display.set_mode(self.track_surface.get_size())
@@ -17,28 +39,82 @@ class DemoRunner:
         self.clock = pygame.time.Clock()
         self.font = pygame.font.Font(None, 36)
         self.font_small = pygame.font.Font(None, 24)
+        self.renderer = DirtyRenderer(self.screen, self.track_surface)
         
     def load_track(self):
-        track_path = os.path.join(os.getcwd(), "assets", "track.png")
-        if not os.path.exists(track_path):
+        if not os.path.exists(DEFAULT_TRACK):
             print("Error: No track found! Run ui/map_editor.py first.")
             sys.exit(1)
-        self.track_surface = pygame.image.load(track_path)
-        
-        pose_path = os.path.join(os.getcwd(), "assets", "start_pose.json")
-        if not os.path.exists(pose_path):
+        if not os.path.exists(POSE_PATH):
             print("Warning: start_pose.json not found. Using default.")
             sys.exit(1)
+        # Memory-mapped from the compiled bundle, which is rebuilt if the PNG or poses changed
+        track = load_track(DEFAULT_TRACK)
+        self.track_surface = track.surface
+        self.road_mask = track.road_mask
+        self.start_pose = track.start_pose
+
+    def load_ghosts(self, config):
+        """Build the ghost field for the chosen mode, or None if there is nothing to race against"""
+        hitbox = Car(scale=0.03).get_hitbox_half_size()
+        if self.ghost_mode == "champions":
+            genomes = load_champions(self.ghost_dir, self.max_ghosts)
+        elif self.ghost_mode == "population":
+            checkpoints = list_checkpoints(self.ghost_dir)
+            if not checkpoints:
+                print(f"Error: No checkpoint found in {self.ghost_dir}.")
+                return None
+            generation, population = load_population(checkpoints[-1])
+            genomes = [(str(key), genome) for key, genome in list(population.items())[:self.max_ghosts]]
+            print(f"Racing the population of generation {generation} from {checkpoints[-1]}")
         else:
-            with open(pose_path, "r") as f:
-                self.start_pose = json.load(f)
+            recordings = list_recordings(self.ghost_dir)
+            if not recordings:
+                print(f"Error: No recordings found in {self.ghost_dir}.")
+                return None
+            generation = self.ghost_generation if self.ghost_generation in recordings else list(recordings)[-1]
+            recording = Recording(recordings[generation])
+            if os.path.abspath(recording.meta["track"]) != os.path.abspath(DEFAULT_TRACK):
+                print(f"Warning: generation {generation} was recorded on {recording.meta['track']}")
+            print(f"Replaying generation {generation} from {recordings[generation]}")
+            return RecordedGhosts(recording, self.max_ghosts)
+        if not genomes:
+            print(f"Error: No genomes found in {self.ghost_dir}. Train with --champions to archive them.")
+            return None
+        return LiveGhosts(genomes, config, self.start_pose, self.road_mask, hitbox)
+
+    def prepare_ghost_images(self, sprite):
+        """Translucent, tinted copies of every pre-rendered rotation of the AI car"""
+        sprite.rotated(0)
+        self.ghost_angle_step = sprite.angle_step
+        self.ghost_images = []
+        for rotation in sprite.rotations:
+            img = rotation.copy()
+            # RGB only, so the transparent corners of the sprite stay transparent
+            img.fill(GHOST_TINT, special_flags=pygame.BLEND_RGB_ADD)
+            img.set_alpha(GHOST_ALPHA)
+            self.ghost_images.append(img)
+
+    def draw_ghosts(self, ghosts, labels: list[pygame.Surface], show_labels: bool) -> int:
+        """Blit every live ghost from cached rotated sprites and name tags; returns how many are alive"""
+        x, y, angle, alive = ghosts.poses()
+        images = self.ghost_images
+        steps = np.rint(angle / self.ghost_angle_step).astype(int) % len(images)
+        blits = []
+        for i in np.flatnonzero(alive):
+            center = (int(x[i]), int(y[i]))
+            img = images[steps[i]]
+            blits.append((img, img.get_rect(center=center)))
+            if show_labels:
+                blits.append((labels[i], (center[0] - 10, center[1] - 40)))
+        for rect in self.screen.blits(blits):
+            self.renderer.mark(rect)
+        return int(np.count_nonzero(alive))
 
     def run(self):
         # Load Config
         config_path = os.path.join(os.getcwd(), "config", "neat-car.cfg")
-        config = neat.Config(neat.DefaultGenome, neat.DefaultReproduction,
-                             neat.DefaultSpeciesSet, neat.DefaultStagnation,
-                             config_path)
+        config = load_config(config_path)
 
         # Load Best Genome
         genome_path = "best_genome.pkl"
@@ -59,12 +135,22 @@ class DemoRunner:
         player_car.angle = self.start_pose["angle_deg"]
         player_car.speed = 0
         
+        ghosts = self.load_ghosts(config) if self.ghost_mode else None
+        if ghosts is not None:
+            self.prepare_ghost_images(ai_car.sprite)
+            # Rendered once; per-frame font rendering is what makes big fields slow
+            labels = [self.font_small.render(label, True, (150, 180, 255)) for label in ghosts.labels]
+            show_labels = len(labels) <= MAX_LABELED_GHOSTS
+        
+        renderer = self.renderer
         running = True
         while running:
             # Event Handling
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     running = False
+                elif event.type == pygame.WINDOWEXPOSED:
+                    renderer.invalidate()
                 elif event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_ESCAPE:
                         running = False
@@ -75,6 +161,10 @@ class DemoRunner:
                         player_car = Car(x=self.start_pose["x"], y=self.start_pose["y"], scale=0.03, image_path=os.path.join(os.getcwd(), "assets", "car_player.png"))
                         player_car.angle = self.start_pose["angle_deg"]
                         player_car.speed = 0
+                        if ghosts is not None:
+                            ghosts.reset()
+                    elif event.key == pygame.K_l and ghosts is not None:
+                        show_labels = not show_labels
 
             # Player Input
             keys = pygame.key.get_pressed()
@@ -87,7 +177,7 @@ class DemoRunner:
             
             if player_car.is_alive:
                 player_car.apply_ai_control(player_outputs)
-                player_car.update(self.track_surface)
+                player_car.update(self.road_mask)
 
             # AI Logic
             if ai_car.is_alive:
@@ -95,22 +185,29 @@ class DemoRunner:
                 inputs.append(ai_car.speed / 10.0)
                 outputs = net.activate(inputs)
                 ai_car.apply_ai_control(outputs)
-                ai_car.update(self.track_surface)
+                ai_car.update(self.road_mask)
+
+            if ghosts is not None:
+                ghosts.step()
 
-            # Drawing
-            self.screen.blit(self.track_surface, (0, 0))
+            # Drawing: only the areas around the cars and text are restored and pushed to the display
+            renderer.begin()
+            
+            # Ghosts go underneath the two racers
+            if ghosts is not None:
+                ghosts_alive = self.draw_ghosts(ghosts, labels, show_labels)
             
             if ai_car.is_alive:
-                ai_car.draw(self.screen, draw_sensors=False)
+                renderer.mark(ai_car.draw(self.screen, draw_sensors=False))
                 # Draw label
                 label = self.font_small.render("AI", True, (255, 100, 100))
-                self.screen.blit(label, (ai_car.x - 10, ai_car.y - 40))
+                renderer.blit(label, (ai_car.x - 10, ai_car.y - 40))
             
             if player_car.is_alive:
-                player_car.draw(self.screen, draw_sensors=False)
+                renderer.mark(player_car.draw(self.screen, draw_sensors=False))
                 # Draw label
                 label = self.font_small.render("YOU", True, (100, 255, 100))
-                self.screen.blit(label, (player_car.x - 15, player_car.y - 40))
+                renderer.blit(label, (player_car.x - 15, player_car.y - 40))
             
             # UI Overlay
             overlay_text = [
@@ -121,6 +218,9 @@ class DemoRunner:
                 "Press 'R' to Reset",
                 "Press 'ESC' to Quit"
             ]
+            if ghosts is not None:
+                overlay_text[1:1] = [f"Ghosts: {ghosts_alive}/{len(ghosts.labels)} ({self.ghost_mode}), 'L' labels",
+                                     f"FPS: {self.clock.get_fps():.0f}"]
             
             # Status
             if not ai_car.is_alive and not player_car.is_alive:
@@ -137,17 +237,33 @@ class DemoRunner:
             
             if msg:
                 text = self.font.render(msg, True, col)
-                self.screen.blit(text, (self.screen.get_width()//2 - text.get_width()//2, 50))
+                renderer.blit(text, (self.screen.get_width()//2 - text.get_width()//2, 50))
             
             for i, line in enumerate(overlay_text):
                 text = self.font_small.render(line, True, (255, 255, 255))
-                pygame.draw.rect(self.screen, (0, 0, 0, 150), (10, 10 + i*30, text.get_width()+10, 25))
-                self.screen.blit(text, (15, 15 + i*30))
+                renderer.mark(pygame.draw.rect(self.screen, (0, 0, 0, 150), (10, 10 + i*30, text.get_width()+10, 25)))
+                renderer.blit(text, (15, 15 + i*30))
 
-            pygame.display.flip()
+            renderer.present()
             self.clock.tick(60)
 
         pygame.quit()
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Race the best trained AI, optionally with a field of ghost cars")
+    parser.add_argument("--ghosts", choices=GHOST_MODES, default=None,
+                        help="add ghosts: every archived generation champion, the latest checkpoint's population "
+                             "(both simulated live), or a recorded generation played back")
+    parser.add_argument("--ghost-dir", default=None,
+                        help=f"where to find them (default: {', '.join(f'{m} {d}/' for m, d in GHOST_DIRS.items())})")
+    parser.add_argument("--generation", type=int, default=None,
+                        help="recorded generation to replay with --ghosts recording (default: the latest)")
+    parser.add_argument("--max-ghosts", type=int, default=MAX_GHOSTS,
+                        help="upper limit on the number of ghosts")
+    args = parser.parse_args(argv)
+    DemoRunner(args.ghosts, args.ghost_dir, args.generation, args.max_ghosts).run()
+    return 0
+
+
 if __name__ == "__main__":
-    DemoRunner().run()
+    sys.exit(main())
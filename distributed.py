@@ -0,0 +1,130 @@
+import os
+import sys
+import time
+import random
+import argparse
+import subprocess
+import numpy as np
+import neat
+from core.car import Car
+from core.simulation import evaluate_track
+from core.track_cache import DEFAULT_TRACK, load_track, resolve_track
+from core.distributed import BATCH_SIZE, TASK_TIMEOUT, DistributedEvaluator, parse_address, run_worker
+from core.speciation import load_config
+from training import CAR_SCALE
+
+CONFIG_PATH = os.path.join("config", "neat-car.cfg")
+
+
+def run_local(args) -> int:
+    """Coordinator plus worker processes on localhost, checked against in-process evaluation"""
+    config = load_config(CONFIG_PATH)
+    tracks = [load_track(resolve_track(name)) for name in args.tracks]
+    hitbox = Car(scale=CAR_SCALE).get_hitbox_half_size()
+    evaluator = DistributedEvaluator(config, tracks, hitbox, ("127.0.0.1", 0),
+                                     batch_size=args.batch_size, task_timeout=args.task_timeout)
+    host, port = evaluator.address
+    env = dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT="1")
+    workers = [subprocess.Popen([sys.executable, os.path.abspath(__file__), "worker", "--connect", f"{host}:{port}",
+                                 "--name", f"local-{n}"], env=env) for n in range(args.workers)]
+
+    random.seed(args.seed)
+    population = neat.Population(config)
+    mismatches = 0
+    generation_time = []
+    killed = None
+
+    def kill_busy_worker(name: str):
+        # At the first result of the generation, so batches are still out; the sender itself is preferred,
+        # since its next batch is already running
+        nonlocal killed
+        if killed is not None or len(generation_time) + 1 != args.kill_worker:
+            return
+        busy = [worker for worker, count in evaluator.in_flight().items() if count and worker.startswith("local-")]
+        if not busy:
+            return
+        killed = name if name in busy else busy[0]
+        process = workers[int(killed.rsplit("-", 1)[1])]
+        process.kill()
+        process.wait()
+        print(f"  > Killed worker {killed} with {evaluator.in_flight()[killed]} batches in flight")
+
+    evaluator.on_result = kill_busy_worker
+    redispatched = 0
+
+    def eval_genomes(genomes, config):
+        nonlocal mismatches, redispatched
+        start = time.perf_counter()
+        before = evaluator.totals["redispatched"]
+        evaluator.eval_genomes(genomes, config)
+        generation_time.append(time.perf_counter() - start)
+        if len(generation_time) == args.kill_worker:
+            redispatched = evaluator.totals["redispatched"] - before
+
+        nets = [neat.nn.FeedForwardNetwork.create(genome, config) for _, genome in genomes]
+        expected = np.mean([evaluate_track(track, nets, hitbox).fitness for track in tracks], axis=0)
+        actual = np.array([genome.fitness for _, genome in genomes])
+        if not np.array_equal(actual, expected):
+            mismatches += int(np.count_nonzero(actual != expected))
+            print(f"  > MISMATCH: {np.count_nonzero(actual != expected)} genomes differ from local evaluation")
+
+    try:
+        population.run(eval_genomes, args.generations)
+    finally:
+        summary = evaluator.worker_summary()
+        totals = evaluator.totals
+        evaluator.close()
+        for worker in workers:
+            worker.wait(timeout=30)
+
+    elapsed = sum(generation_time)
+    print(f"\n{args.generations} generations in {elapsed:.2f}s, "
+          f"{args.generations * config.pop_size * len(tracks) / elapsed:.0f} genomes/s over the network")
+    print(f"{totals['batches']} batches, {totals['redispatched']} re-dispatched, {totals['dropped']} workers lost, "
+          f"{totals['sent'] / 1024:.1f} KB sent, {totals['received'] / 1024:.1f} KB received")
+    for line in summary:
+        print(f"  {line}")
+    print("Fitness matches local evaluation" if not mismatches else f"{mismatches} fitness mismatches")
+    failover = not args.kill_worker or redispatched > 0
+    if not failover:
+        print(f"Generation {args.kill_worker} re-dispatched no batches, so failover was not exercised")
+    return 0 if not mismatches and failover else 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Distributed genome evaluation over TCP")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    worker = commands.add_parser("worker", help="evaluate batches for a coordinator (training.py --distributed)")
+    worker.add_argument("--connect", default="127.0.0.1", metavar="HOST[:PORT]",
+                        help="coordinator address")
+    worker.add_argument("--name", default=None, help="name shown in the coordinator's reports")
+    worker.add_argument("--connect-timeout", type=float, default=30.0, metavar="SECONDS",
+                        help="keep retrying the connection this long")
+
+    local = commands.add_parser("local", help="test harness: a coordinator and N workers on localhost")
+    local.add_argument("--workers", type=int, default=3, help="worker processes to start")
+    local.add_argument("--generations", type=int, default=3)
+    local.add_argument("--tracks", nargs="+", default=[DEFAULT_TRACK], metavar="TRACK",
+                       help="tracks to evaluate on, as paths or names from assets/")
+    local.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    local.add_argument("--task-timeout", type=float, default=TASK_TIMEOUT, metavar="SECONDS")
+    local.add_argument("--kill-worker", type=int, default=2, metavar="GEN",
+                       help="kill a worker with batches in flight when this generation's first result arrives, "
+                            "and fail unless they are re-dispatched; 0 = never")
+    local.add_argument("--seed", type=int, default=1, help="seed for the population")
+    args = parser.parse_args(argv)
+
+    if args.command == "worker":
+        batches = run_worker(parse_address(args.connect), args.connect_timeout, args.name)
+        print(f"Worker done after {batches} batches")
+        return 0
+    if args.workers < 1 or (args.kill_worker and args.workers < 2):
+        parser.error("the harness needs at least one worker, and two to survive --kill-worker")
+    if args.kill_worker > args.generations:
+        parser.error("--kill-worker must name one of the --generations")
+    return run_local(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,6 +3,8 @@ import os
 from ui.map_editor import main as run_map_editor_main
 from training import main as run_training_main
 from demo_run import DemoRunner
+from replay import ReplayViewer
+from core.recording import RECORDING_DIR, list_recordings
 
 ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
 if ROOT_DIR not in sys.path:
@@ -15,7 +17,7 @@ def run_map_editor():
         pass
     return True
 
-def run_neat_training():
+def run_neat_training(headless=False):
     track_path = os.path.join(ROOT_DIR, "assets", "track.png")
     pose_path = os.path.join(ROOT_DIR, "assets", "start_pose.json")
     
@@ -24,7 +26,7 @@ def run_neat_training():
         return False
     
     try:
-        run_training_main()
+        run_training_main(["--headless"] if headless else [])
     except SystemExit:
         pass
     return True
@@ -41,6 +43,18 @@ def run_demo():
         pass
     return True
 
+def run_replay():
+    if not list_recordings(RECORDING_DIR):
+        print("\n[!] No recordings found. Train with: python training.py --record")
+        input("Press Enter to continue...")
+        return False
+
+    try:
+        ReplayViewer(RECORDING_DIR).run()
+    except SystemExit:
+        pass
+    return True
+
 def main():
     while True:
         os.system('cls' if os.name == 'nt' else 'clear')
@@ -49,19 +63,25 @@ def main():
         print("="*50)
         print("1. Launch Map Editor (Create Track)")
         print("2. Start NEAT Training (Evolve AI)")
-        print("3. Run Turing Test (Human vs AI)")
-        print("4. Exit")
+        print("3. Start Headless Training (No Display)")
+        print("4. Run Turing Test (Human vs AI)")
+        print("5. Replay Recorded Generations")
+        print("6. Exit")
         print("="*50)
         
-        choice = input("Select an option (1-4): ").strip()
+        choice = input("Select an option (1-6): ").strip()
         
         if choice == "1":
             run_map_editor()
         elif choice == "2":
             run_neat_training()
         elif choice == "3":
-            run_demo()
+            run_neat_training(headless=True)
         elif choice == "4":
+            run_demo()
+        elif choice == "5":
+            run_replay()
+        elif choice == "6":
             print("Exiting...")
             break
         else:
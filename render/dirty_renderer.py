@@ -0,0 +1,52 @@
+import pygame
+
+# Above this share of the screen, one flip() is cheaper than many small updates
+FULL_UPDATE_FRACTION = 0.5
+
+
+class DirtyRenderer:
+    """Draws over a static background and pushes only the regions that changed.
+
+    Every frame, begin() restores the background under everything drawn in
+    the previous frame. Drawing through blit()/mark() records the touched
+    rectangles, and present() sends the old and new rectangles to the
+    display. The background is converted to the display format once, so
+    restoring it is a plain copy.
+    """
+
+    def __init__(self, screen: pygame.Surface, background: pygame.Surface):
+        self.screen = screen
+        self.background = background.convert()
+        self.previous = []
+        self.current = []
+        self.full = True
+
+    def invalidate(self):
+        """Repaint and push the whole screen next frame, e.g. after something else drew over it"""
+        self.full = True
+
+    def begin(self):
+        if self.full:
+            self.screen.blit(self.background, (0, 0))
+        else:
+            for rect in self.previous:
+                self.screen.blit(self.background, rect, rect)
+        self.current = []
+
+    def mark(self, rect: pygame.Rect | None) -> pygame.Rect | None:
+        if rect is not None:
+            self.current.append(rect.inflate(2, 2).clip(self.screen.get_rect()))
+        return rect
+
+    def blit(self, surface: pygame.Surface, pos) -> pygame.Rect:
+        return self.mark(self.screen.blit(surface, pos))
+
+    def present(self):
+        dirty = self.previous + self.current
+        area = sum(rect.w * rect.h for rect in dirty)
+        if self.full or area > FULL_UPDATE_FRACTION * self.screen.get_width() * self.screen.get_height():
+            pygame.display.flip()
+        else:
+            pygame.display.update(dirty)
+        self.previous = self.current
+        self.full = False
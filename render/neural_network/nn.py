@@ -64,7 +64,8 @@ class NN:
                 if input_key in node_map and output_key in node_map:
                     self.connections.append(Connection(node_map[input_key], node_map[output_key], c.weight))
 
-    def draw(self, screen: pygame.Surface):
+    def render(self) -> tuple[pygame.Surface, tuple[int, int]]:
+        """Draw the whole diagram onto its own panel; returns the panel and its screen position"""
         # Draw background for network
         # Calculate bounds
         min_x = min(n.x for n in self.nodes) - Node.RADIUS - 60
@@ -79,9 +80,14 @@ class NN:
         panel = pygame.Surface((width, height), pygame.SRCALPHA)
         panel.fill((255, 255, 255, 230)) # White with slight transparency
         pygame.draw.rect(panel, (200, 200, 200), (0, 0, width, height), 2) # Border
-        screen.blit(panel, (min_x, min_y))
 
+        offset = (min_x, min_y)
         for c in self.connections:
-            c.draw(screen)
+            c.draw(panel, offset)
         for node in self.nodes:
-            node.draw(screen)
+            node.draw(panel, offset)
+        return panel, offset
+
+    def draw(self, screen: pygame.Surface):
+        panel, pos = self.render()
+        screen.blit(panel, pos)
@@ -27,21 +27,22 @@ class Node:
         if Node.FONT is None:
             Node.FONT = pygame.font.SysFont("comicsans", 15)
 
-    def draw(self, screen: pygame.Surface):
+    def draw(self, screen: pygame.Surface, offset: tuple[int, int] = (0, 0)):
         color_scheme = self.get_color()
+        x, y = self.x - offset[0], self.y - offset[1]
 
-        pygame.draw.circle(screen, color_scheme[0], (self.x, self.y), Node.RADIUS)
-        pygame.draw.circle(screen, color_scheme[1], (self.x, self.y), Node.RADIUS - 2)
+        pygame.draw.circle(screen, color_scheme[0], (x, y), Node.RADIUS)
+        pygame.draw.circle(screen, color_scheme[1], (x, y), Node.RADIUS - 2)
 
         if self.type != NodeType.HIDDEN:
             text = Node.FONT.render(self.label, 1, Color.BLACK)
             # Adjust text position based on type
             if self.type == NodeType.INPUT:
-                text_x = self.x - Node.RADIUS - 5 - text.get_width()
+                text_x = x - Node.RADIUS - 5 - text.get_width()
             else:
-                text_x = self.x + Node.RADIUS + 5
+                text_x = x + Node.RADIUS + 5
                 
-            screen.blit(text, (text_x, self.y - text.get_height()/2))
+            screen.blit(text, (text_x, y - text.get_height()/2))
 
     def get_color(self):
         # Simplified color logic for now to avoid index errors
@@ -59,8 +60,8 @@ class Connection:
         self.output = output_node
         self.wt = wt
 
-    def draw(self, screen):
+    def draw(self, screen, offset: tuple[int, int] = (0, 0)):
         color = Color.GREEN if self.wt >= 0 else Color.RED
         width = max(1, int(abs(self.wt * Node.CONNECTION_WIDTH)))
-        pygame.draw.line(screen, color, (self.input.x + Node.RADIUS, self.input.y), 
-                         (self.output.x - Node.RADIUS, self.output.y), width)
+        pygame.draw.line(screen, color, (self.input.x + Node.RADIUS - offset[0], self.input.y - offset[1]), 
+                         (self.output.x - Node.RADIUS - offset[0], self.output.y - offset[1]), width)
@@ -0,0 +1,62 @@
+import time
+import pygame
+
+
+class RenderScheduler:
+    """Decides which simulated frames get drawn and which cars appear on them.
+
+    The simulation always advances every frame; drawing happens every
+    render_every frames, or at most target_fps times per second when that is
+    set. With top_k, only the K fittest alive cars are drawn and only the
+    leader gets sensor rays; 0 draws every car as before. Settings can be
+    changed at runtime with hotkeys.
+    """
+    KEYS_HELP = "+/- render rate, F fps cap, [/] top-K, A all cars"
+    FPS_STEPS = (0, 60, 30, 10)
+
+    def __init__(self, render_every: int = 1, target_fps: float = 0, top_k: int = 0):
+        self.render_every = max(1, render_every)
+        self.target_fps = target_fps
+        self.top_k = max(0, top_k)
+        self.last_render = None
+
+    def should_render(self, frame_count: int, last_frame: bool = False) -> bool:
+        if last_frame:
+            return True
+        if self.target_fps > 0:
+            now = time.perf_counter()
+            if self.last_render is not None and now - self.last_render < 1.0 / self.target_fps:
+                return False
+            self.last_render = now
+            return True
+        return frame_count % self.render_every == 0
+
+    def select(self, fitnesses, alive) -> list[int]:
+        """Indices of the alive cars to draw, best first"""
+        order = sorted((i for i, a in enumerate(alive) if a), key=lambda i: fitnesses[i], reverse=True)
+        return order[:self.top_k] if self.top_k else order
+
+    def handle_key(self, key: int) -> bool:
+        """Apply a hotkey; returns True if it was one of ours"""
+        if key in (pygame.K_EQUALS, pygame.K_PLUS, pygame.K_KP_PLUS):
+            self.render_every = max(1, self.render_every // 2)
+        elif key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+            self.render_every = min(1024, self.render_every * 2)
+        elif key == pygame.K_f:
+            steps = self.FPS_STEPS
+            self.target_fps = steps[(steps.index(self.target_fps) + 1) % len(steps)] if self.target_fps in steps else 0
+            self.last_render = None
+        elif key == pygame.K_RIGHTBRACKET:
+            self.top_k = 1 if self.top_k == 0 else self.top_k * 2
+        elif key == pygame.K_LEFTBRACKET:
+            self.top_k = max(1, self.top_k // 2)
+        elif key == pygame.K_a:
+            self.top_k = 0
+        else:
+            return False
+        return True
+
+    def describe(self) -> str:
+        rate = f"<= {self.target_fps:g} fps" if self.target_fps > 0 else f"every {self.render_every} frames"
+        cars = f"top {self.top_k}" if self.top_k else "all cars"
+        return f"Render: {rate}, {cars}"
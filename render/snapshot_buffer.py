@@ -0,0 +1,89 @@
+import threading
+import numpy as np
+
+
+class Snapshot:
+    """Car state and fitness of every car at one simulated frame, in preallocated arrays"""
+
+    def __init__(self, count: int, sensors: int):
+        self.x = np.zeros(count)
+        self.y = np.zeros(count)
+        self.angle = np.zeros(count)
+        self.speed = np.zeros(count)
+        self.alive = np.zeros(count, dtype=bool)
+        self.distance_traveled = np.zeros(count)
+        self.sensor_distances = np.zeros((count, sensors))
+        self.fitness = np.zeros(count)
+        self.frame = 0
+        self.alive_count = 0
+
+    def capture_batch(self, batch, fitness: np.ndarray):
+        np.copyto(self.x, batch.x)
+        np.copyto(self.y, batch.y)
+        np.copyto(self.angle, batch.angle)
+        np.copyto(self.speed, batch.speed)
+        np.copyto(self.alive, batch.alive)
+        np.copyto(self.distance_traveled, batch.distance_traveled)
+        np.copyto(self.sensor_distances, batch.sensor_distances)
+        np.copyto(self.fitness, fitness)
+
+    def capture_cars(self, cars: list, genomes: list):
+        self.x[:] = [car.x for car in cars]
+        self.y[:] = [car.y for car in cars]
+        self.angle[:] = [car.angle for car in cars]
+        self.speed[:] = [car.speed for car in cars]
+        self.alive[:] = [car.is_alive for car in cars]
+        self.distance_traveled[:] = [car.distance_traveled for car in cars]
+        self.sensor_distances[:] = [car.sensor_distances for car in cars]
+        self.fitness[:] = [genome.fitness for genome in genomes]
+
+    def apply_to(self, cars: list):
+        """Copy the state into Car objects that are only used for drawing"""
+        for i, car in enumerate(cars):
+            car.x = float(self.x[i])
+            car.y = float(self.y[i])
+            car.angle = float(self.angle[i])
+            car.speed = float(self.speed[i])
+            car.is_alive = bool(self.alive[i])
+            car.distance_traveled = float(self.distance_traveled[i])
+            car.sensor_distances = self.sensor_distances[i].tolist()
+
+
+class SnapshotBuffer:
+    """Hands the newest car state from the simulation thread to the render thread.
+
+    Double-buffered with a spare slot: the simulation fills the back slot and
+    swaps it with the latest one, and the renderer swaps the latest with the
+    one it draws from. The lock only guards those index swaps, so the
+    simulation never waits for a draw and the renderer never waits for a
+    step. Frames published faster than they are drawn are dropped.
+    """
+
+    def __init__(self, count: int, sensors: int):
+        self.slots = [Snapshot(count, sensors) for _ in range(3)]
+        self.back, self.latest, self.front = 0, 1, 2
+        self.fresh = False
+        self.lock = threading.Lock()
+
+    @property
+    def wanted(self) -> bool:
+        """True once the renderer has taken the last published snapshot; publishing more often is wasted copying"""
+        return not self.fresh
+
+    def back_slot(self) -> Snapshot:
+        """The slot the simulation fills before publish(); never read by the renderer"""
+        return self.slots[self.back]
+
+    def publish(self):
+        with self.lock:
+            self.back, self.latest = self.latest, self.back
+            self.fresh = True
+
+    def acquire(self) -> Snapshot | None:
+        """The newest published snapshot, or None if nothing was published since the last call"""
+        with self.lock:
+            if not self.fresh:
+                return None
+            self.front, self.latest = self.latest, self.front
+            self.fresh = False
+        return self.slots[self.front]
@@ -0,0 +1,54 @@
+import pygame
+
+# Process-wide sprites keyed by (image path, scale, angle step, converted)
+_sprites = {}
+
+
+class Sprite:
+    """A scaled car image with rotations pre-rendered at a fixed angle step.
+
+    Rotations are quantized to angle_step (the steering increment) and all
+    rendered on the first draw, so drawing a car is a list lookup instead of a
+    pygame.transform.rotate call. Tinted variants are cached the same way.
+    """
+
+    def __init__(self, image: pygame.Surface, angle_step: float):
+        self.image = image
+        self.angle_step = angle_step
+        self.steps = int(round(360 / angle_step))
+        self.rotations = None
+        self.tinted = {}
+
+    def rotated(self, angle: float, tint: tuple[int, int, int] | None = None) -> pygame.Surface:
+        if self.rotations is None:
+            self.rotations = [pygame.transform.rotate(self.image, -i * self.angle_step) for i in range(self.steps)]
+        step = int(round(angle / self.angle_step)) % self.steps
+        if tint is None:
+            return self.rotations[step]
+        key = (tuple(tint), step)
+        img = self.tinted.get(key)
+        if img is None:
+            overlay = pygame.Surface(self.rotations[step].get_size(), pygame.SRCALPHA)
+            overlay.fill((*tint, 80))
+            img = self.rotations[step].copy()
+            img.blit(overlay, (0, 0), special_flags=pygame.BLEND_RGBA_ADD)
+            self.tinted[key] = img
+        return img
+
+
+def get_sprite(path: str | None, scale: float, angle_step: float, fallback) -> Sprite:
+    """Load, convert and scale an image once per process; path None uses fallback()"""
+    # convert_alpha needs a video mode; headless runs only use the image size
+    converted = pygame.display.get_surface() is not None
+    key = (path, scale, angle_step, converted)
+    sprite = _sprites.get(key)
+    if sprite is None:
+        image = pygame.image.load(path) if path else fallback()
+        if converted:
+            image = image.convert_alpha()
+        if scale != 1.0:
+            w = int(image.get_width() * scale)
+            h = int(image.get_height() * scale)
+            image = pygame.transform.smoothscale(image, (w, h))
+        sprite = _sprites[key] = Sprite(image, angle_step)
+    return sprite
@@ -0,0 +1,179 @@
+import sys
+import argparse
+import pygame
+from core.car import Car
+from core.recording import Recording, RECORDING_DIR, list_recordings
+
+SPEEDS = (0.25, 0.5, 1, 2, 4, 8, 16)
+TIMELINE_HEIGHT = 14
+
+
+class ReplayViewer:
+    """Plays back generations recorded with training.py --record.
+
+    Only the generation on screen is held in memory; switching generation
+    loads the next file. Cars are redrawn from the recorded poses with the
+    same Car.draw as training, and the fittest car shows its sensor rays.
+    """
+
+    def __init__(self, directory: str = RECORDING_DIR):
+        self.directory = directory
+        self.generations = list(list_recordings(directory))
+        if not self.generations:
+            print(f"Error: No recordings found in {directory}. Train with --record first.")
+            sys.exit(1)
+        pygame.init()
+        self.font = pygame.font.Font(None, 28)
+        self.font_small = pygame.font.Font(None, 20)
+        self.clock = pygame.time.Clock()
+        self.screen = None
+        self.track_path = None
+        self.recording = None
+        self.cars = []
+        self.frame = 0.0
+        self.speed_index = SPEEDS.index(1)
+        self.paused = False
+        self.typed = ""
+        self.scrubbing = False
+
+    def load_generation(self, generation: int):
+        paths = list_recordings(self.directory)
+        self.generations = list(paths)
+        if generation not in paths:
+            # Closest recorded generation, e.g. when only some generations were kept
+            generation = min(self.generations, key=lambda g: abs(g - generation))
+        self.recording = Recording(paths[generation])
+        meta = self.recording.meta
+        if meta["track"] != self.track_path:
+            self.track_path = meta["track"]
+            self.track_surface = pygame.image.load(self.track_path)
+            self.screen = pygame.display.set_mode(self.track_surface.get_size())
+        pygame.display.set_caption(f"Replay - Generation {self.recording.generation}")
+        if len(self.cars) != meta["cars"]:
+            self.cars = [Car(scale=meta["car_scale"]) for _ in range(meta["cars"])]
+        self.best = int(self.recording.fitness.argmax()) if len(self.recording.fitness) else 0
+        self.frame = 0.0
+
+    def step_generation(self, direction: int):
+        index = self.generations.index(self.recording.generation) + direction
+        if 0 <= index < len(self.generations):
+            self.load_generation(self.generations[index])
+
+    def seek(self, frame: float):
+        self.frame = min(max(frame, 0.0), self.recording.frames - 1)
+
+    def handle_events(self) -> bool:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                return False
+            elif event.type == pygame.KEYDOWN:
+                step = 10 if event.mod & pygame.KMOD_SHIFT else 1
+                if event.key == pygame.K_ESCAPE:
+                    return False
+                elif event.key == pygame.K_SPACE:
+                    self.paused = not self.paused
+                    if not self.paused and self.frame >= self.recording.frames - 1:
+                        self.seek(0)
+                elif event.key == pygame.K_RIGHT:
+                    self.paused = True
+                    self.seek(int(self.frame) + step)
+                elif event.key == pygame.K_LEFT:
+                    self.paused = True
+                    self.seek(int(self.frame) - step)
+                elif event.key == pygame.K_UP:
+                    self.speed_index = min(self.speed_index + 1, len(SPEEDS) - 1)
+                elif event.key == pygame.K_DOWN:
+                    self.speed_index = max(self.speed_index - 1, 0)
+                elif event.key == pygame.K_HOME:
+                    self.seek(0)
+                elif event.key == pygame.K_END:
+                    self.seek(self.recording.frames - 1)
+                elif event.key in (pygame.K_PAGEUP, pygame.K_b):
+                    self.step_generation(-1)
+                elif event.key in (pygame.K_PAGEDOWN, pygame.K_n):
+                    self.step_generation(1)
+                elif event.unicode.isdigit():
+                    self.typed += event.unicode
+                elif event.key == pygame.K_BACKSPACE:
+                    self.typed = self.typed[:-1]
+                elif event.key in (pygame.K_RETURN, pygame.K_KP_ENTER) and self.typed:
+                    self.load_generation(int(self.typed))
+                    self.typed = ""
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                self.scrubbing = event.pos[1] >= self.screen.get_height() - TIMELINE_HEIGHT * 2
+                if self.scrubbing:
+                    self.scrub(event.pos[0])
+            elif event.type == pygame.MOUSEMOTION and self.scrubbing:
+                self.scrub(event.pos[0])
+            elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+                self.scrubbing = False
+        return True
+
+    def scrub(self, x: int):
+        self.seek(x / max(self.screen.get_width() - 1, 1) * (self.recording.frames - 1))
+
+    def draw(self):
+        rec, f = self.recording, int(self.frame)
+        self.screen.blit(self.track_surface, (0, 0))
+
+        alive = rec.alive[f]
+        order = [i for i in range(len(self.cars)) if alive[i] and i != self.best]
+        if alive[self.best]:
+            order.append(self.best)
+        for i in order:
+            car = self.cars[i]
+            car.x, car.y, car.angle = float(rec.x[f, i]), float(rec.y[f, i]), float(rec.angle[f, i])
+            car.sensor_distances = rec.sensors[f, i].tolist()
+            car.draw(self.screen, draw_sensors=i == self.best)
+
+        info = [
+            f"Generation: {rec.generation} ({self.generations.index(rec.generation) + 1}/{len(self.generations)})",
+            f"Frame: {f}/{rec.frames - 1}",
+            f"Alive: {int(alive.sum())}/{len(self.cars)}",
+            f"Best Fitness: {rec.fitness[self.best]:.1f}  Speed: {float(rec.speed[f, self.best]):.1f}",
+            f"Playback: {'paused' if self.paused else f'{SPEEDS[self.speed_index]:g}x'}",
+        ]
+        if self.typed:
+            info.append(f"Go to generation: {self.typed}_")
+        for i, text in enumerate(info):
+            surf = self.font.render(text, True, (255, 255, 255))
+            self.screen.blit(surf, (10, 10 + i * 30))
+
+        help_text = ("Space pause, Left/Right step (Shift x10), Up/Down speed, PgUp/PgDn or B/N generation, "
+                     "digits+Enter jump, drag timeline, ESC quit")
+        surf = self.font_small.render(help_text, True, (200, 200, 200))
+        height, width = self.screen.get_height(), self.screen.get_width()
+        self.screen.blit(surf, (10, height - TIMELINE_HEIGHT - 22))
+
+        pygame.draw.rect(self.screen, (40, 40, 40), (0, height - TIMELINE_HEIGHT, width, TIMELINE_HEIGHT))
+        played = int(width * f / max(rec.frames - 1, 1))
+        pygame.draw.rect(self.screen, (90, 160, 255), (0, height - TIMELINE_HEIGHT, played, TIMELINE_HEIGHT))
+        pygame.display.flip()
+
+    def run(self, generation: int | None = None):
+        self.load_generation(self.generations[-1] if generation is None else generation)
+        running = True
+        while running:
+            running = self.handle_events()
+            if not self.paused and not self.scrubbing:
+                if self.frame >= self.recording.frames - 1:
+                    self.paused = True
+                else:
+                    self.seek(self.frame + SPEEDS[self.speed_index])
+            self.draw()
+            self.clock.tick(60)
+        pygame.quit()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay generations recorded with training.py --record")
+    parser.add_argument("--dir", default=RECORDING_DIR, help="directory holding the gen-N.npz recordings")
+    parser.add_argument("--generation", type=int, default=None,
+                        help="generation to open (default: the latest recorded)")
+    args = parser.parse_args(argv)
+    ReplayViewer(args.dir).run(args.generation)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
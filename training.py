@@ -1,28 +1,116 @@
 import sys
 import os
-import json
+import time
+import pickle
+import argparse
+import threading
 import pygame
 import neat
+import numpy as np
 from core.car import Car
+from core.car_batch import CarBatch
+from core.simulation import BatchSimulation, MAX_FRAMES, evaluate_track
+from core.parallel import ParallelEvaluator
+from core.distributed import DistributedEvaluator, BATCH_SIZE, TASK_TIMEOUT, parse_address
+from core.track_cache import DEFAULT_TRACK, load_track, resolve_track
+from core.curriculum import Curriculum, AGGREGATES
+from core.sensor_lut import PRECISIONS
+from core.checkpoint import BackgroundWriter, AsyncCheckpointer, CHECKPOINT_DIR, list_checkpoints, restore_checkpoint
+from core.stats import CSVStatsReporter
+from core.recording import TrajectoryRecorder, RECORDING_DIR
+from core.fitness_cache import FitnessCache
+from core.progress import ProgressTracker, FITNESS_MODES
+from core.ghosts import CHAMPION_DIR
+from core.halving import HalvingSchedule, load_schedule
+from core.speciation import load_config
+from core import profiler
+from core.profiler import Profiler
 from ui.visualizer import draw_network
+from render.render_scheduler import RenderScheduler
+from render.dirty_renderer import DirtyRenderer
+from render.snapshot_buffer import Snapshot, SnapshotBuffer
 
 FPS = 0
+# Display rate of the pipelined window when no --render-fps cap is set
+PIPELINE_FPS = 60
+CAR_SCALE = 0.03
+GENERATIONS = 50
+STATS_PATH = "training_stats.csv"
+PROFILE_PATH = "profile.jsonl"
+FITNESS_CACHE_SIZE = 4096
+SENSOR_ENGINES = ("grid", "distance-field", "lut")
 
 class NEATSimulation:
-    def __init__(self):
+    def __init__(self, headless: bool = False, sensor_engine: str = "grid", vectorized: bool = False, workers: int = 1,
+                 lut_options: dict | None = None, scheduler: RenderScheduler | None = None,
+                 writer: BackgroundWriter | None = None, track_paths: list[str] | None = None,
+                 curriculum: Curriculum | None = None, phase_profiler: Profiler | None = None,
+                 recorder: TrajectoryRecorder | None = None, fitness_cache: FitnessCache | None = None,
+                 fitness_mode: str = "distance", champion_dir: str | None = None, pipelined: bool = False,
+                 distributed: dict | None = None, halving: HalvingSchedule | None = None):
+        track_paths = track_paths or [DEFAULT_TRACK]
+        if sensor_engine not in SENSOR_ENGINES:
+            raise ValueError(f"Unknown sensor engine: {sensor_engine}")
+        if fitness_mode not in FITNESS_MODES:
+            raise ValueError(f"Unknown fitness mode: {fitness_mode}")
+        if workers > 1 and not headless:
+            raise ValueError("Parallel evaluation only runs headless")
+        if distributed is not None and (not headless or workers > 1):
+            raise ValueError("Distributed evaluation only runs headless, in place of local worker processes")
+        if len(track_paths) > 1 and not headless:
+            raise ValueError("Multi-track evaluation only runs headless")
+        if recorder is not None and (workers > 1 or distributed is not None or len(track_paths) > 1):
+            raise ValueError("Recording only covers single-track, single-process evaluation")
+        if pipelined and headless:
+            raise ValueError("The pipelined mode only applies to windowed training")
+        if halving is not None and (workers > 1 or distributed is not None):
+            raise ValueError("Successive halving ranks the whole population, so it only runs in a single process")
+        self.headless = headless
+        self.pipelined = pipelined
+        self.sensor_engine = sensor_engine
+        self.lut_options = lut_options or {}
+        self.vectorized = vectorized
+        self.fitness_mode = fitness_mode
+        self.champion_dir = champion_dir
+        if champion_dir:
+            os.makedirs(champion_dir, exist_ok=True)
+        self.progress = None
+        self.workers = workers
+        self.distributed = distributed
+        self.evaluator = None
+        self.halving = halving
+        self.halving_run = None
+        self.track_paths = track_paths
+        self.curriculum = curriculum or Curriculum(len(track_paths))
+        self.scheduler = scheduler or RenderScheduler()
+        if pipelined and not self.scheduler.target_fps:
+            # Frames are drawn at a rate, not every Nth simulated frame
+            self.scheduler.target_fps = PIPELINE_FPS
+        self.writer = writer
+        self.recorder = recorder
+        # Skipping cars would leave holes in the window and the recordings, so only headless runs use the cache.
+        # Halving ranks every car against the others and estimates the fitness of those it retires, so a cached
+        # value would change which cars survive and an estimate is not a genome's own fitness.
+        self.fitness_cache = fitness_cache if headless and recorder is None and halving is None else None
+        # Switched on with --profile or the P key; profiler.current is what the hot paths check
+        self.profiler = phase_profiler or Profiler()
         pygame.init()
         self.load_track()
-        self.screen = pygame.display.set_mode(self.track_surface.get_size())
-        pygame.display.set_caption("NEAT Car Racing - AI Training")
-        self.clock = pygame.time.Clock()
-        self.font = pygame.font.Font(None, 28)
-        self.font_small = pygame.font.Font(None, 20)
+        if not self.headless:
+            self.screen = pygame.display.set_mode(self.track_surface.get_size())
+            pygame.display.set_caption("NEAT Car Racing - AI Training")
+            self.clock = pygame.time.Clock()
+            self.font = pygame.font.Font(None, 28)
+            self.font_small = pygame.font.Font(None, 20)
+            self.renderer = DirtyRenderer(self.screen, self.track_surface)
         self.cars = []
         self.nets = []
         self.genomes = []
         
         self.generation = 0
         self.max_fitness = 0
+        self.total_frames = 0
+        self.total_time = 0.0
         
     def wait_for_start(self):
         waiting = True
@@ -50,24 +138,29 @@ class NEATSimulation:
                 elif event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_SPACE:
                         waiting = False
+                        self.renderer.invalidate()
                     elif event.key == pygame.K_ESCAPE:
                         pygame.quit()
                         sys.exit()
             self.clock.tick(30)
 
     def load_track(self):
-        track_path = os.path.join(os.getcwd(), "assets", "track.png")
-        if not os.path.exists(track_path):
-            print("Error: No track found! Run ui/map_editor.py first.")
-            sys.exit(1)
-        self.track_surface = pygame.image.load(track_path)
-        
-        pose_path = os.path.join(os.getcwd(), "assets", "start_pose.json")
-        if not os.path.exists(pose_path):
-            self.start_pose = {"x": 500, "y": 350, "angle_deg": 0}
-        else:
-            with open(pose_path, "r") as f:
-                self.start_pose = json.load(f)
+        self.tracks = []
+        for path in self.track_paths:
+            track_path = os.path.join(os.getcwd(), path)
+            if not os.path.exists(track_path):
+                print(f"Error: Track {path} not found! Run ui/map_editor.py first.")
+                sys.exit(1)
+            self.tracks.append(load_track(track_path, self.sensor_engine, self.lut_options, self.fitness_mode))
+        
+        # The first track is the one drawn and used by the single-track paths
+        track = self.tracks[0]
+        self.track_surface = track.surface
+        self.road_mask = track.road_mask
+        self.distance_field = track.distance_field
+        self.sensor_lut = track.sensor_lut
+        self.progress_index = track.progress_index
+        self.start_pose = track.start_pose
     
     def eval_genomes(self, genomes, config):
         self.generation += 1
@@ -75,9 +168,78 @@ class NEATSimulation:
         self.nets = []
         self.genomes = []
         self.config = config
+        self.best_index = 0
+        self.best_fitness = 0.0
+        
+        if profiler.current:
+            profiler.current.start_generation()
+        all_genomes = [genome for _, genome in genomes]
+        if self.fitness_cache is not None:
+            context = self.evaluation_context()
+            genomes = [(genome_id, genome) for genome_id, genome in genomes
+                       if not self.use_cached_fitness(genome, context)]
         
+        start = time.perf_counter()
+        if not genomes:
+            frames = 0
+        elif self.workers > 1 or self.distributed is not None or len(self.tracks) > 1:
+            self.genomes = [genome for _, genome in genomes]
+            frames = self.run_tracks()
+        else:
+            self.setup_cars(genomes, config)
+            start = time.perf_counter()
+            frames = self.run_generation()
+            self.finish_halving()
+        elapsed = time.perf_counter() - start
+        if self.fitness_cache is not None:
+            for _, genome in genomes:
+                self.fitness_cache.put(genome, context, genome.fitness)
+            print(f"  > Fitness cache: {self.fitness_cache.end_generation()}")
+        if self.recorder is not None:
+            self.recorder.end_generation(self.generation, [g.fitness for g in self.genomes],
+                                         self.track_paths[0], CAR_SCALE)
+        self.total_frames += frames
+        self.total_time += elapsed
+        self.report_speed(frames, elapsed)
+        if profiler.current:
+            summary = profiler.current.end_generation(self.generation)
+            print("  > Phase totals: " + ", ".join(f"{phase} {s['total_ms']:.0f}ms" for phase, s in summary.items()))
+
+        # Save best genome if it beats the record
+        if all_genomes:
+            current_best = max(all_genomes, key=lambda g: g.fitness)
+            if self.champion_dir:
+                # Every generation's champion, for ghost races in demo_run.py
+                self.save_genome(current_best, os.path.join(self.champion_dir, f"gen-{self.generation:05d}.pkl"))
+            if current_best.fitness >= self.max_fitness:
+                self.save_genome(current_best)
+                print(f"  > Saved new best genome (Fitness: {current_best.fitness:.1f})")
+
+    def evaluation_context(self) -> tuple:
+        """Everything besides the genome that decides its fitness, as a fitness cache key"""
+        tracks = tuple((os.path.abspath(track.path), os.path.getmtime(track.path), tuple(track.start_pose.values()))
+                       for track in self.tracks[:self.curriculum.unlocked])
+        return (tracks, self.curriculum.aggregate, self.sensor_engine, tuple(sorted(self.lut_options.items())),
+                self.vectorized, self.fitness_mode)
+
+    def use_cached_fitness(self, genome, context) -> bool:
+        fitness = self.fitness_cache.get(genome, context)
+        if fitness is None:
+            return False
+        genome.fitness = fitness
+        self.max_fitness = max(self.max_fitness, fitness)
+        return True
+
+    def setup_cars(self, genomes, config):
+        """Create a car and network for every (genome_id, genome) pair, ready for run_generation"""
+        self.cars = []
+        self.nets = []
+        self.genomes = []
+        self.config = config
+        self.best_index = 0
+        self.best_fitness = 0.0
         for genome_id, genome in genomes:
-            car = Car(x=self.start_pose["x"], y=self.start_pose["y"], scale=0.03)
+            car = Car(x=self.start_pose["x"], y=self.start_pose["y"], scale=CAR_SCALE)
             car.angle = self.start_pose["angle_deg"]
             net = neat.nn.FeedForwardNetwork.create(genome, config)
             genome.fitness = 0
@@ -85,134 +247,538 @@ class NEATSimulation:
             self.cars.append(car)
             self.nets.append(net)
             self.genomes.append(genome)
-        
-        self.run_generation()
 
-        # Save best genome if it beats the record
-        if self.genomes:
-            current_best = max(self.genomes, key=lambda g: g.fitness)
-            if current_best.fitness >= self.max_fitness:
-                import pickle
-                with open("best_genome.pkl", "wb") as f:
-                    pickle.dump(current_best, f)
-                print(f"  > Saved new best genome (Fitness: {current_best.fitness:.1f})")
+    def save_genome(self, genome, path: str = "best_genome.pkl"):
+        """Pickle now, write on the background writer if there is one"""
+        data = pickle.dumps(genome)
+        if self.writer is not None:
+            self.writer.submit(path, data)
+        else:
+            with open(path, "wb") as f:
+                f.write(data)
     
-    def run_generation(self):
+    def run_tracks(self) -> int:
+        """Evaluate self.genomes on every unlocked track, on the worker pool if there is one; returns frames simulated"""
+        active = range(self.curriculum.unlocked)
+        hitbox = Car(scale=CAR_SCALE).get_hitbox_half_size()
+        if self.distributed is not None:
+            if self.evaluator is None:
+                self.evaluator = DistributedEvaluator(self.config, self.tracks, hitbox, sensor_engine=self.sensor_engine,
+                                                      lut_options=self.lut_options, fitness_mode=self.fitness_mode,
+                                                      **self.distributed)
+            fitness, frames, max_fitness = self.evaluator.evaluate(self.genomes, active)
+            print(f"  > Distributed: {self.evaluator.last_report}")
+        elif self.workers > 1:
+            if self.evaluator is None:
+                self.evaluator = ParallelEvaluator(self.workers, self.config, self.tracks, hitbox)
+            fitness, frames, max_fitness = self.evaluator.evaluate(self.genomes, active)
+        else:
+            nets = [neat.nn.FeedForwardNetwork.create(genome, self.config) for genome in self.genomes]
+            fitness = np.zeros((len(active), len(nets)))
+            frames, max_fitness = 0, 0.0
+            for row, index in enumerate(active):
+                simulation = evaluate_track(self.tracks[index], nets, hitbox, halving=self.halving)
+                if simulation.halving is not None:
+                    print(f"  > Successive halving on {self.tracks[index].name}: {simulation.halving.report()}")
+                fitness[row] = simulation.fitness
+                frames += simulation.frame_count
+                max_fitness = max(max_fitness, simulation.max_fitness)
+        
+        combined = self.curriculum.combine(fitness)
+        for genome, value in zip(self.genomes, combined):
+            genome.fitness = float(value)
+        if len(active) > 1:
+            # Peaks on single tracks are not comparable with the aggregate
+            max_fitness = float(combined.max())
+        self.max_fitness = max(self.max_fitness, max_fitness)
+        
+        if self.curriculum.update(float(combined.max())):
+            unlocked = self.tracks[self.curriculum.unlocked - 1]
+            print(f"  > Unlocked track {unlocked.name} ({self.curriculum.unlocked}/{len(self.tracks)} tracks)")
+            # Fitness over the harder track set starts a new record
+            self.max_fitness = 0
+        return frames
+
+    def close(self):
+        if self.evaluator is not None:
+            self.evaluator.close()
+            self.evaluator = None
+
+    def report_speed(self, frames: int, elapsed: float):
+        elapsed = max(elapsed, 1e-9)
+        print(f"  > Generation {self.generation}: {frames} frames in {elapsed:.2f}s "
+              f"({1.0 / elapsed:.2f} gen/s, {frames / elapsed:.0f} frames/s)")
+
+    def start_simulation(self):
+        """Reset per-generation simulation state; returns step(frame_count) -> cars alive at the frame's start"""
+        if self.vectorized:
+            self.batch_sim = BatchSimulation(CarBatch.from_cars(self.cars), self.nets, self.road_mask,
+                                             self.distance_field, self.sensor_lut, self.progress_index, self.halving)
+            self.halving_run = self.batch_sim.halving
+        else:
+            start_positions = [(c.x, c.y) for c in self.cars]
+            car_history = [[] for _ in self.cars]
+            if self.progress_index is not None:
+                self.progress = ProgressTracker(self.progress_index, [c.x for c in self.cars], [c.y for c in self.cars])
+            self.halving_run = None if self.halving is None else self.halving.start(len(self.cars))
+        if self.recorder is not None:
+            self.recorder.start_generation(len(self.cars))
+
+        def step(frame_count: int) -> int:
+            if self.vectorized:
+                alive_count = self.batch_sim.step()
+                self.max_fitness = max(self.max_fitness, self.batch_sim.max_fitness)
+            else:
+                alive_count = self.step_cars(frame_count, start_positions, car_history)
+                if self.halving_run is not None and self.halving_run.due(frame_count, alive_count):
+                    self.retire_cars()
+            if self.recorder is not None:
+                self.record_frame()
+            return alive_count
+        return step
+
+    def retire_cars(self):
+        """Stop the cars the halving schedule drops at this horizon (per-car loop; BatchSimulation does its own)"""
+        fitness = np.array([genome.fitness for genome in self.genomes], dtype=np.float64)
+        alive = np.array([car.is_alive for car in self.cars])
+        for i in np.flatnonzero(self.halving_run.retire(fitness, alive)):
+            self.cars[i].is_alive = False
+
+    def finish_halving(self):
+        """Give cars retired by the halving schedule their estimated fitness and report the frames saved"""
+        if self.halving_run is None:
+            return
+        fitness = self.halving_run.finish([genome.fitness for genome in self.genomes])
+        for genome, value in zip(self.genomes, fitness):
+            genome.fitness = float(value)
+        print(f"  > Successive halving: {self.halving_run.report()}")
+
+    def run_generation(self) -> int:
+        """Simulate the current population and return the number of frames run"""
+        if self.pipelined:
+            return self.run_pipelined()
         running = True
         frame_count = 0
-        max_frames = 1000
-        
-        start_positions = [(c.x, c.y) for c in self.cars]
-        car_history = [[] for _ in self.cars]
+        max_frames = MAX_FRAMES
+        step = self.start_simulation()
         
         while running and frame_count < max_frames:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_ESCAPE:
-                        pygame.quit()
-                        sys.exit()
-            
-            alive_count = 0
-            for i, car in enumerate(self.cars):
-                if car.is_alive:
-                    alive_count += 1
-                    
-                    inputs = [d / Car.MAX_SENSOR_DISTANCE for d in car.sensor_distances]
-                    inputs.append(car.speed / 10.0)
-                    
-                    outputs = self.nets[i].activate(tuple(inputs))
-                    car.apply_ai_control(outputs)
-                    car.update(self.track_surface)
-                    
-                    self.genomes[i].fitness = car.distance_traveled * 0.1
-                    
-                    # Kill if stopped
-                    if frame_count > 50 and car.speed < 0.5:
-                        car.is_alive = False
-                        self.genomes[i].fitness -= 5
-
-                    # Kill if stagnated
-                    if frame_count == 100:
-                        dx = car.x - start_positions[i][0]
-                        dy = car.y - start_positions[i][1]
-                        if (dx**2 + dy**2)**0.5 < 50:
-                            car.is_alive = False
-                            self.genomes[i].fitness -= 10
-
-                    # Kill if spinning (Donut Detector)
-                    if frame_count % 60 == 0:
-                        history = car_history[i]
-                        history.append((car.x, car.y))
-                        if len(history) > 2:
-                            prev_x, prev_y = history[-3]
-                            if ((car.x - prev_x)**2 + (car.y - prev_y)**2)**0.5 < 50:
-                                car.is_alive = False
-                                self.genomes[i].fitness -= 5
-                    
-                    if self.genomes[i].fitness > self.max_fitness:
-                        self.max_fitness = self.genomes[i].fitness
+            alive_count = step(frame_count)
             
             if alive_count == 0:
                 running = False
             
-            self.screen.blit(self.track_surface, (0, 0))
-            
-            for car in self.cars:
-                if car.is_alive:
-                    car.draw(self.screen, draw_sensors=True)
-            
-            info = [
-                f"Generation: {self.generation}",
-                f"Alive: {alive_count}/{len(self.cars)}",
-                f"Frame: {frame_count}/{max_frames}",
-                f"Max Fitness: {self.max_fitness:.1f}"
-            ]
-            
-            for i, text in enumerate(info):
-                surf = self.font.render(text, True, (255, 255, 255))
-                self.screen.blit(surf, (10, 10 + i * 35))
-            
-            if self.genomes:
-                best_genome = max(self.genomes, key=lambda g: g.fitness)
-                draw_network(self.screen, self.config, best_genome, (self.screen.get_width() - 310, 10), (300, 200))
-
-            pygame.display.flip()
-            self.clock.tick(FPS)
+            # Simulation runs every frame; drawing (and event polling) only when scheduled, and always for the
+            # generation's final state
+            last_frame = not running or frame_count == max_frames - 1
+            if not self.headless and self.scheduler.should_render(frame_count, last_frame):
+                self.handle_events()
+                if self.vectorized:
+                    self.sync_batch()
+                self.draw_frame(alive_count, frame_count, max_frames)
+                self.clock.tick(FPS)
+            if profiler.current:
+                profiler.current.end_frame()
             frame_count += 1
+        
+        if self.vectorized:
+            self.sync_batch()
+        return frame_count
+
+    def run_pipelined(self) -> int:
+        """run_generation with the simulation on a worker thread and drawing on this one.
+
+        The simulation publishes car state into a SnapshotBuffer whenever the
+        previous snapshot has been taken, and this thread draws the newest one
+        at the display rate while handling events, so a slow draw never holds
+        back evolution and a fast simulation never floods the window.
+        """
+        step = self.start_simulation()
+        buffer = SnapshotBuffer(len(self.cars), len(Car.SENSOR_ANGLES))
+        view_cars = [Car(scale=CAR_SCALE) for _ in self.cars]
+        stop = threading.Event()
+        result = {}
+
+        def simulate():
+            try:
+                frame_count = 0
+                alive_count = len(self.cars)
+                while alive_count and frame_count < MAX_FRAMES and not stop.is_set():
+                    alive_count = step(frame_count)
+                    if buffer.wanted or alive_count == 0 or frame_count == MAX_FRAMES - 1:
+                        self.capture(buffer.back_slot(), alive_count, frame_count)
+                        buffer.publish()
+                    # One read: the P key clears profiler.current from the drawing thread
+                    prof = profiler.current
+                    if prof:
+                        prof.end_frame()
+                    frame_count += 1
+                result["frames"] = frame_count
+            except BaseException as e:
+                result["error"] = e
+
+        thread = threading.Thread(target=simulate, name="simulation", daemon=True)
+        thread.start()
+        try:
+            drawing = True
+            while drawing:
+                drawing = thread.is_alive()
+                self.handle_events()
+                snapshot = buffer.acquire()
+                if snapshot is not None:
+                    snapshot.apply_to(view_cars)
+                    self.draw_frame(snapshot.alive_count, snapshot.frame, MAX_FRAMES, view_cars, snapshot.fitness)
+                if drawing:
+                    self.clock.tick(self.scheduler.target_fps or PIPELINE_FPS)
+        finally:
+            stop.set()
+            thread.join()
+        if "error" in result:
+            raise result["error"]
+
+        if self.vectorized:
+            self.sync_batch()
+        return result["frames"]
+
+    def capture(self, snapshot: Snapshot, alive_count: int, frame_count: int):
+        """Fill a snapshot from the simulation state; runs on the simulation thread"""
+        if self.vectorized:
+            snapshot.capture_batch(self.batch_sim.batch, self.batch_sim.fitness)
+        else:
+            snapshot.capture_cars(self.cars, self.genomes)
+        snapshot.alive_count = alive_count
+        snapshot.frame = frame_count
+
+    def handle_events(self):
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                sys.exit()
+            elif event.type == pygame.WINDOWEXPOSED:
+                self.renderer.invalidate()
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    pygame.quit()
+                    sys.exit()
+                elif event.key == pygame.K_p:
+                    profiler.current = None if profiler.current else self.profiler
+                self.scheduler.handle_key(event.key)
+
+    def step_cars(self, frame_count: int, start_positions: list, car_history: list) -> int:
+        """Advance every alive car one frame and apply the fitness/kill rules"""
+        alive_count = 0
+        prof = profiler.current
+        for i, car in enumerate(self.cars):
+            if car.is_alive:
+                alive_count += 1
+                
+                if prof: start = time.perf_counter()
+                inputs = [d / Car.MAX_SENSOR_DISTANCE for d in car.sensor_distances]
+                inputs.append(car.speed / 10.0)
+                
+                outputs = self.nets[i].activate(tuple(inputs))
+                if prof: prof.add("inference", start); start = time.perf_counter()
+                car.apply_ai_control(outputs)
+                if prof: prof.add("physics", start)
+                car.update(self.road_mask, self.distance_field, self.sensor_lut)
+                
+                if prof: start = time.perf_counter()
+                if self.progress is not None:
+                    # Kill if stalled (no lap progress for PROGRESS_WINDOW frames)
+                    if self.progress.update_car(i, car.x, car.y, frame_count):
+                        car.is_alive = False
+                    self.genomes[i].fitness = float(self.progress.progress[i]) * 0.1
+                else:
+                    self.apply_distance_rules(i, car, frame_count, start_positions, car_history)
+                
+                if self.genomes[i].fitness > self.max_fitness:
+                    self.max_fitness = self.genomes[i].fitness
+                self.track_best(i)
+                if prof: prof.add("fitness", start)
+        
+        return alive_count
+
+    def apply_distance_rules(self, i: int, car: Car, frame_count: int, start_positions: list, car_history: list):
+        """Fitness from distance driven, with the stopped, stagnation and spinning kill rules"""
+        self.genomes[i].fitness = car.distance_traveled * 0.1
 
-def run_neat(config_path):
-    config = neat.Config(
-        neat.DefaultGenome, neat.DefaultReproduction,
-        neat.DefaultSpeciesSet, neat.DefaultStagnation,
-        config_path
-    )
+        # Kill if stopped
+        if frame_count > 50 and car.speed < 0.5:
+            car.is_alive = False
+            self.genomes[i].fitness -= 5
+
+        # Kill if stagnated
+        if frame_count == 100:
+            dx = car.x - start_positions[i][0]
+            dy = car.y - start_positions[i][1]
+            if (dx**2 + dy**2)**0.5 < 50:
+                car.is_alive = False
+                self.genomes[i].fitness -= 10
+
+        # Kill if spinning (Donut Detector)
+        if frame_count % 60 == 0:
+            history = car_history[i]
+            history.append((car.x, car.y))
+            if len(history) > 2:
+                prev_x, prev_y = history[-3]
+                if ((car.x - prev_x)**2 + (car.y - prev_y)**2)**0.5 < 50:
+                    car.is_alive = False
+                    self.genomes[i].fitness -= 5
+
+    def record_frame(self):
+        if self.vectorized:
+            batch = self.batch_sim.batch
+            self.recorder.record(batch.x, batch.y, batch.angle, batch.speed, batch.alive, batch.sensor_distances)
+        else:
+            self.recorder.record_cars(self.cars)
+
+    def track_best(self, i: int):
+        """Keep best_index current as car i's fitness changes; a penalized leader forces a rescan"""
+        fitness = self.genomes[i].fitness
+        if self.best_index is None:
+            return
+        if i == self.best_index and fitness < self.best_fitness:
+            self.best_index = None
+        elif fitness > self.best_fitness or i == self.best_index:
+            self.best_index = i
+            self.best_fitness = fitness
+
+    def best_genome(self):
+        if self.vectorized:
+            return self.genomes[int(np.argmax(self.batch_sim.fitness))]
+        if self.best_index is None:
+            self.best_index = max(range(len(self.genomes)), key=lambda i: self.genomes[i].fitness)
+            self.best_fitness = self.genomes[self.best_index].fitness
+        return self.genomes[self.best_index]
+
+    def sync_batch(self):
+        """Copy batch state into the Car objects and fitness into the genomes"""
+        self.batch_sim.batch.sync_to(self.cars)
+        for genome, fitness in zip(self.genomes, self.batch_sim.fitness):
+            genome.fitness = float(fitness)
+
+    def draw_frame(self, alive_count: int, frame_count: int, max_frames: int,
+                   cars: list[Car] | None = None, fitnesses: np.ndarray | None = None):
+        """Draw the cars and HUD; cars and fitnesses default to the live population"""
+        if cars is None:
+            cars, fitnesses, best = self.cars, [g.fitness for g in self.genomes], self.best_genome
+        else:
+            # A snapshot; best_genome() would read state the simulation thread is changing
+            best = lambda: self.genomes[int(np.argmax(fitnesses))]
+        prof = profiler.current
+        if prof: start = time.perf_counter()
+        # Only the areas drawn last frame are restored from the track, and only changed areas reach the display
+        renderer = self.renderer
+        renderer.begin()
+        
+        # Leader last so it is drawn on top; with top-K it is the only one showing sensor rays
+        shown = self.scheduler.select(fitnesses, [c.is_alive for c in cars])
+        for rank in reversed(range(len(shown))):
+            renderer.mark(cars[shown[rank]].draw(self.screen, draw_sensors=rank == 0 or not self.scheduler.top_k))
+        
+        info = [
+            f"Generation: {self.generation}",
+            f"Alive: {alive_count}/{len(cars)}",
+            f"Frame: {frame_count}/{max_frames}",
+            f"Max Fitness: {self.max_fitness:.1f}"
+        ]
+        
+        for i, text in enumerate(info):
+            surf = self.font.render(text, True, (255, 255, 255))
+            renderer.blit(surf, (10, 10 + i * 35))
+        
+        for i, text in enumerate((self.scheduler.describe(), self.scheduler.KEYS_HELP + ", P profiler")):
+            surf = self.font_small.render(text, True, (200, 200, 200))
+            renderer.blit(surf, (10, self.screen.get_height() - 45 + i * 20))
+        
+        if prof:
+            # Per-frame percentiles from the last finished generation
+            for i, text in enumerate(prof.hud_lines()):
+                surf = self.font_small.render(text, True, (255, 220, 120))
+                renderer.blit(surf, (10, 160 + i * 20))
+            prof.add("render", start)
+            start = time.perf_counter()
+        
+        if self.genomes:
+            renderer.mark(draw_network(self.screen, self.config, best(),
+                                       (self.screen.get_width() - 310, 10), (300, 200)))
+        if prof: prof.add("network", start); start = time.perf_counter()
+
+        renderer.present()
+        if prof: prof.add("render", start)
+
+def run_neat(config_path, headless: bool = False, sensor_engine: str = "grid", vectorized: bool = False, workers: int = 1,
+             lut_options: dict | None = None, scheduler: RenderScheduler | None = None,
+             checkpoint_every: int = 5, keep_checkpoints: int = 3, checkpoint_dir: str = CHECKPOINT_DIR,
+             resume: bool = False, track_paths: list[str] | None = None, unlock_fitness: float | None = None,
+             curriculum_start: int = 1, aggregate: str = "mean", stats_path: str | None = STATS_PATH,
+             phase_profiler: Profiler | None = None, record_dir: str | None = None,
+             fitness_cache_size: int = FITNESS_CACHE_SIZE, fitness_mode: str = "distance",
+             champion_dir: str | None = None, pipelined: bool = False, distributed: dict | None = None):
+    config = load_config(config_path)
     
-    population = neat.Population(config)
+    extra = {}
+    checkpoints = list_checkpoints(checkpoint_dir) if resume else []
+    if checkpoints:
+        population, extra = restore_checkpoint(checkpoints[-1], config)
+        print(f"Resuming from {checkpoints[-1]} (generation {population.generation})")
+    else:
+        if resume:
+            print(f"No checkpoint found in {checkpoint_dir}, starting a new run")
+        population = neat.Population(config)
     population.add_reporter(neat.StdOutReporter(True))
-    population.add_reporter(neat.StatisticsReporter())
+    halving = load_schedule(config_path, MAX_FRAMES)
+    if halving is not None:
+        print(f"Successive halving: {halving}")
+    
+    track_paths = track_paths or [DEFAULT_TRACK]
+    curriculum = Curriculum(len(track_paths), unlock_fitness, curriculum_start, aggregate)
+    if unlock_fitness is not None:
+        curriculum.unlocked = min(extra.get("unlocked_tracks", curriculum.unlocked), len(track_paths))
     
-    simulation = NEATSimulation()
-    simulation.wait_for_start()
+    writer = BackgroundWriter()
+    recorder = TrajectoryRecorder(writer, record_dir) if record_dir else None
+    simulation = NEATSimulation(headless=headless, sensor_engine=sensor_engine, vectorized=vectorized, workers=workers,
+                                lut_options=lut_options, scheduler=scheduler, writer=writer,
+                                track_paths=track_paths, curriculum=curriculum, phase_profiler=phase_profiler,
+                                recorder=recorder,
+                                fitness_cache=FitnessCache(fitness_cache_size) if fitness_cache_size > 0 else None,
+                                fitness_mode=fitness_mode, champion_dir=champion_dir, pipelined=pipelined,
+                                distributed=distributed, halving=halving)
+    if phase_profiler is not None:
+        profiler.current = phase_profiler
+    if stats_path:
+        # Streams rows to disk instead of keeping every generation like neat.StatisticsReporter
+        population.add_reporter(CSVStatsReporter(writer, stats_path, lambda: simulation.total_frames,
+                                                 population.generation if checkpoints else None))
+    simulation.generation = start_generation = population.generation
+    simulation.max_fitness = extra.get("max_fitness", 0)
+    if checkpoint_every > 0:
+        population.add_reporter(AsyncCheckpointer(
+            writer, checkpoint_dir, checkpoint_every, keep_checkpoints,
+            get_extra=lambda: {"max_fitness": simulation.max_fitness, "unlocked_tracks": curriculum.unlocked}))
+    if not headless:
+        simulation.wait_for_start()
     
-    winner = population.run(simulation.eval_genomes, 50)
+    try:
+        winner = population.run(simulation.eval_genomes, max(GENERATIONS - start_generation, 1))
+        simulation.save_genome(winner)
+    finally:
+        simulation.close()
+        writer.close()
     
     print("\n✓ Training completed!")
-    import pickle
-    with open("best_genome.pkl", "wb") as f:
-        pickle.dump(winner, f)
+    generations = simulation.generation - start_generation
+    if simulation.total_time > 0:
+        print(f"Simulated {generations} generations in {simulation.total_time:.1f}s "
+              f"({generations / simulation.total_time:.2f} gen/s)")
     print("Best genome saved to best_genome.pkl")
 
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train NEAT cars on the current track")
+    parser.add_argument("--headless", action="store_true",
+                        help="run without a window or per-frame rendering")
+    parser.add_argument("--sensors", choices=SENSOR_ENGINES, default="grid",
+                        help="ray casting engine: 1px grid steps, distance-field raymarching or a cached lookup table")
+    parser.add_argument("--lut-cell", type=int, default=2,
+                        help="lookup table cell size in pixels (--sensors lut)")
+    parser.add_argument("--lut-heading-step", type=float, default=1.0,
+                        help="lookup table heading resolution in degrees (--sensors lut)")
+    parser.add_argument("--lut-precision", choices=tuple(PRECISIONS), default="uint8",
+                        help="lookup table storage: whole pixels (uint8) or 1/256 px (uint16)")
+    parser.add_argument("--vectorized", action="store_true",
+                        help="step the whole population as NumPy arrays (CarBatch)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="evaluate genomes across this many processes (requires --headless)")
+    parser.add_argument("--distributed", metavar="[HOST:]PORT", default=None,
+                        help="evaluate on workers that connect over TCP (python distributed.py worker --connect "
+                             "HOST:PORT) instead of local processes (requires --headless)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                        help="genomes per batch sent to a distributed worker")
+    parser.add_argument("--task-timeout", type=float, default=TASK_TIMEOUT, metavar="SECONDS",
+                        help="re-dispatch a distributed batch if its worker has not answered within this time")
+    parser.add_argument("--render-every", type=int, default=1,
+                        help="draw every Nth simulated frame (hotkeys +/-)")
+    parser.add_argument("--render-fps", type=float, default=0,
+                        help="draw at most this many frames per second instead, 0 = off (hotkey F)")
+    parser.add_argument("--top-k", type=int, default=0,
+                        help="draw only the K fittest cars, 0 = all; sensor rays are shown for the leader (hotkeys [ ] A)")
+    parser.add_argument("--pipelined", action="store_true",
+                        help="simulate on a worker thread and draw the newest car state at the display rate, "
+                             "so drawing never slows training (windowed only)")
+    parser.add_argument("--fitness", choices=FITNESS_MODES, default="distance",
+                        help="score distance driven, or lap progress along the track with cars culled as soon as "
+                             "they stop making progress")
+    parser.add_argument("--tracks", nargs="+", metavar="TRACK", default=[DEFAULT_TRACK],
+                        help="tracks to evaluate every genome on, as paths or names from assets/ (e.g. simple1 hard2); "
+                             "more than one requires --headless")
+    parser.add_argument("--track-aggregate", choices=tuple(AGGREGATES), default="mean",
+                        help="how per-track fitness is combined")
+    parser.add_argument("--curriculum-unlock", type=float, default=None, metavar="FITNESS",
+                        help="start on the first --curriculum-start tracks and unlock the next one "
+                             "whenever a generation's best fitness reaches FITNESS")
+    parser.add_argument("--curriculum-start", type=int, default=1,
+                        help="tracks unlocked at the start of a curriculum")
+    parser.add_argument("--stats-csv", default=STATS_PATH, metavar="PATH",
+                        help="per-generation statistics CSV, appended to when resuming; empty to disable")
+    parser.add_argument("--champions", nargs="?", const=CHAMPION_DIR, default=None, metavar="DIR",
+                        help=f"archive every generation's best genome for demo_run.py --ghosts champions "
+                             f"(default dir: {CHAMPION_DIR}); use a fresh dir per run, files are named by generation")
+    parser.add_argument("--profile", action="store_true",
+                        help="time sensors, physics, inference, fitness and rendering per frame (toggle with P)")
+    parser.add_argument("--profile-dump", default=PROFILE_PATH, metavar="PATH",
+                        help="file that receives one JSON line of phase percentiles per generation")
+    parser.add_argument("--cprofile", action="store_true",
+                        help="also run every generation under cProfile, saved as <profile-dump>.gen<N>.prof")
+    parser.add_argument("--record", nargs="?", const=RECORDING_DIR, default=None, metavar="DIR",
+                        help=f"save every car's trajectory per generation for replay.py (default dir: {RECORDING_DIR}); "
+                             "single track, single process only")
+    parser.add_argument("--fitness-cache", type=int, default=FITNESS_CACHE_SIZE, metavar="N",
+                        help="headless: reuse the fitness of up to N unchanged genomes instead of re-simulating them, "
+                             "0 = off")
+    parser.add_argument("--checkpoint-every", type=int, default=5,
+                        help="save the full population every N generations, 0 = never")
+    parser.add_argument("--keep-checkpoints", type=int, default=3,
+                        help="number of most recent checkpoints to keep")
+    parser.add_argument("--checkpoint-dir", default=CHECKPOINT_DIR,
+                        help="directory for checkpoint files")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue from the latest checkpoint")
+    args = parser.parse_args(argv)
+
     config_path = os.path.join(os.getcwd(), "config", "neat-car.cfg")
     if not os.path.exists(config_path):
         print(f"Error: Config file not found at {config_path}")
         return 1
     
-    run_neat(config_path)
+    if args.workers > 1 and not args.headless:
+        parser.error("--workers requires --headless")
+    if len(args.tracks) > 1 and not args.headless:
+        parser.error("more than one track requires --headless")
+    if args.distributed and (not args.headless or args.workers > 1):
+        parser.error("--distributed requires --headless and replaces --workers")
+    if args.pipelined and args.headless:
+        parser.error("--pipelined only applies to windowed training")
+    if args.record and (args.workers > 1 or args.distributed or len(args.tracks) > 1):
+        parser.error("--record needs a single track, --workers 1 and no --distributed")
+    
+    lut_options = {"cell_size": args.lut_cell, "heading_step": args.lut_heading_step, "precision": args.lut_precision}
+    scheduler = RenderScheduler(args.render_every, args.render_fps, args.top_k)
+    phase_profiler = Profiler(args.profile_dump, args.cprofile) if args.profile or args.cprofile else None
+    distributed = None
+    if args.distributed:
+        distributed = {"address": parse_address(args.distributed, "0.0.0.0"), "batch_size": args.batch_size,
+                       "task_timeout": args.task_timeout}
+    run_neat(config_path, headless=args.headless, sensor_engine=args.sensors,
+             vectorized=args.vectorized, workers=args.workers, lut_options=lut_options, scheduler=scheduler,
+             checkpoint_every=args.checkpoint_every, keep_checkpoints=max(args.keep_checkpoints, 1),
+             checkpoint_dir=args.checkpoint_dir, resume=args.resume,
+             track_paths=[resolve_track(name) for name in args.tracks], unlock_fitness=args.curriculum_unlock,
+             curriculum_start=args.curriculum_start, aggregate=args.track_aggregate, stats_path=args.stats_csv,
+             phase_profiler=phase_profiler, record_dir=args.record,
+             fitness_cache_size=args.fitness_cache, fitness_mode=args.fitness, champion_dir=args.champions,
+             pipelined=args.pipelined, distributed=distributed)
     return 0
 
 
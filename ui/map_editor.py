@@ -4,6 +4,8 @@ import json
 import pygame
 
 from core.car import Car
+from core.sensor_lut import SensorLUT
+from core.track_cache import compile_track
 
 
 WINDOW_SIZE = (1000, 700)
@@ -35,15 +37,27 @@ def draw_button(surface, rect, label, font, hovered, active=False):
 def save_track(track_surface):
     path = os.path.join(os.getcwd(), "assets")
     os.makedirs(path, exist_ok=True)
-    pygame.image.save(track_surface, os.path.join(path, "track.png"))
+    track_path = os.path.join(path, "track.png")
+    pygame.image.save(track_surface, track_path)
+    # Cached sensor tables describe the old layout
+    SensorLUT.remove_cached(track_path)
+    compile_track(track_path)
 
 
 def save_start_pose(pos, angle_deg):
     path = os.path.join(os.getcwd(), "assets")
     os.makedirs(path, exist_ok=True)
-    data = {"x": pos[0], "y": pos[1], "angle_deg": angle_deg}
-    with open(os.path.join(path, "start_pose.json"), "w") as f:
+    pose_path = os.path.join(path, "start_pose.json")
+    data = {}
+    if os.path.exists(pose_path):
+        with open(pose_path, "r") as f:
+            data = json.load(f)
+    # Keep the poses of other tracks listed under "tracks"
+    data.update({"x": pos[0], "y": pos[1], "angle_deg": angle_deg})
+    with open(pose_path, "w") as f:
         json.dump(data, f)
+    # The bundle carries the start pose, so recompile it with the new one
+    compile_track(os.path.join(path, "track.png"))
 
 
 def is_on_road(point, track_surface):
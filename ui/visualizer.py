@@ -1,10 +1,30 @@
+from collections import OrderedDict
 import pygame
 from render.neural_network.nn import NN
 
+# Rendered diagram panels, keyed by genome identity/structure and position
+_panels = OrderedDict()
+MAX_CACHED_PANELS = 8
+
+
+def _panel_key(genome, pos):
+    # A genome's weights only change through mutate(), which NEAT runs on new child genomes,
+    # so the object identity plus its gene counts pins down what gets drawn
+    return genome.key, id(genome), len(genome.nodes), len(genome.connections), pos
+
+
 def draw_network(surface, config, genome, pos, size):
     adjusted_pos = (pos[0] + 10, pos[1] + 110)
-    nn = NN(config, genome, adjusted_pos)
-    
-    # Draw
-    nn.draw(surface)
+    key = _panel_key(genome, adjusted_pos)
+    cached = _panels.get(key)
+    if cached is None:
+        cached = NN(config, genome, adjusted_pos).render()
+        _panels[key] = cached
+        if len(_panels) > MAX_CACHED_PANELS:
+            _panels.popitem(last=False)
+    else:
+        _panels.move_to_end(key)
 
+    # Draw
+    panel, panel_pos = cached
+    return surface.blit(panel, panel_pos)